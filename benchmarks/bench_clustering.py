@@ -0,0 +1,73 @@
+"""
+Benchmark suite for the clustering pipeline: generate_student_data,
+preprocess_data, cluster_students, analyze_clusters and predict_cluster at
+several cohort sizes. Run it through run_benchmarks.py:
+
+    python benchmarks/run_benchmarks.py --suite clustering --sizes 1000 100000 1000000
+
+Generated CSVs are kept in $BENCH_DATA_DIR (default: a directory under the
+system temp dir) and reused by later cases and runs.
+"""
+import contextlib
+import os
+import tempfile
+
+import workloads  # noqa: F401  (sets up sys.path)
+from cluster_analysis import analyze_clusters, cluster_students, predict_cluster, preprocess_data
+from data_generator import generate_student_data, write_student_data
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+STAGES = ["generate_student_data", "preprocess_data", "cluster_students", "analyze_clusters", "predict_cluster"]
+TRAINING_ROWS = 1_000  # predict_cluster cases score the cohort with a model trained on this many students
+
+
+def cases(sizes=None):
+    """Case list; sizes are numbers of students."""
+    return [(stage, {"rows": rows}) for rows in sizes or DEFAULT_SIZES for stage in STAGES]
+
+
+def student_csv(rows, seed=0):
+    """Returns the path of a generated CSV of rows students, writing it on first use."""
+    data_dir = os.environ.get("BENCH_DATA_DIR") or os.path.join(tempfile.gettempdir(), "student_bench_data")
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"students_{rows}_seed{seed}.csv")
+    if not os.path.exists(path):
+        partial_path = path[:-len(".csv")] + ".partial.csv"
+        write_student_data(partial_path, rows, seed=seed)
+        os.replace(partial_path, path)
+    return path
+
+
+def _quiet(function):
+    """Wraps function so its printed report goes to /dev/null rather than the benchmark's stdout."""
+    def run():
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            return function()
+    return run
+
+
+def setup(name, params, seed=0):
+    rows = params["rows"]
+
+    if name == "generate_student_data":
+        return (lambda: generate_student_data(rows, seed=seed)), rows
+
+    path = student_csv(rows, seed)
+    if name == "preprocess_data":
+        return (lambda: preprocess_data(path)), rows
+
+    if name == "predict_cluster":
+        training_df, scaler = preprocess_data(student_csv(TRAINING_ROWS, seed))
+        _, kmeans_model = cluster_students(training_df)
+        return (lambda: predict_cluster(path, scaler, kmeans_model)), rows
+
+    preprocessed_df, _ = preprocess_data(path)
+    if name == "cluster_students":
+        # cluster_students adds a 'Cluster' column, so each call gets its own copy
+        return (lambda: cluster_students(preprocessed_df.copy())), rows
+
+    if name == "analyze_clusters":
+        clustered_df, _ = cluster_students(preprocessed_df)
+        return _quiet(lambda: analyze_clusters(clustered_df)), rows
+
+    raise ValueError(f"unknown clustering case {name!r}")
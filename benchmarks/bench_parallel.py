@@ -0,0 +1,42 @@
+"""
+Measures how process_vector_queries_parallel scales from 1 to N worker processes.
+
+    python benchmarks/bench_parallel.py --queries 400000 --max-workers 8
+"""
+import argparse
+import os
+import time
+
+import workloads  # noqa: F401  (sets up sys.path)
+from parallel_queries import DEFAULT_CHUNK_SIZE, process_vector_queries_parallel
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    queries = workloads.query_corpus(args.queries, seed=args.seed)
+    worker_counts = sorted({1, *(2 ** i for i in range(args.max_workers.bit_length())), args.max_workers})
+    worker_counts = [w for w in worker_counts if w <= args.max_workers]
+
+    baseline = None
+    expected = None
+    print(f"{len(queries)} queries, chunk size {args.chunk_size}")
+    print(f"{'workers':>8} {'seconds':>9} {'queries/s':>12} {'speedup':>8}")
+    for workers in worker_counts:
+        start = time.perf_counter()
+        results = process_vector_queries_parallel(queries, workers=workers, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        if expected is None:
+            baseline, expected = elapsed, results
+        elif results != expected:
+            raise SystemExit(f"results with {workers} workers differ from the single-process run")
+        print(f"{workers:>8} {elapsed:>9.3f} {len(queries) / elapsed:>12,.0f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compares query_parser.parse_literal with ast.literal_eval on a synthetic corpus.
+
+    python benchmarks/bench_query_parser.py --queries 100000
+"""
+import argparse
+import ast
+import time
+
+import workloads  # noqa: F401  (sets up sys.path)
+from query_parser import parse_literal
+
+
+def _outcome(parse, query):
+    try:
+        return "ok", parse(query)
+    except (ValueError, SyntaxError, TypeError) as e:
+        return "error", type(e).__name__
+
+
+def _best_time(parse, queries, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in queries:
+            try:
+                parse(query)
+            except (ValueError, SyntaxError, TypeError):
+                pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    queries = workloads.query_corpus(args.queries, seed=args.seed)
+
+    mismatches = sum(_outcome(ast.literal_eval, q) != _outcome(parse_literal, q) for q in queries)
+    if mismatches:
+        raise SystemExit(f"{mismatches} queries parsed differently")
+
+    literal_eval_time = _best_time(ast.literal_eval, queries, args.repeat)
+    parse_literal_time = _best_time(parse_literal, queries, args.repeat)
+
+    print(f"{len(queries)} queries, best of {args.repeat}")
+    print(f"  ast.literal_eval: {literal_eval_time:.3f}s ({len(queries) / literal_eval_time:,.0f} queries/s)")
+    print(f"  parse_literal:    {parse_literal_time:.3f}s ({len(queries) / parse_literal_time:,.0f} queries/s)")
+    print(f"  speedup:          {literal_eval_time / parse_literal_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Load-tests VectorQueryService with in-process clients: many concurrent
+coroutines each send queries one after another, and per-query latency is
+compared with calling process_vector_query directly.
+
+    python benchmarks/bench_service.py --clients 1000 --queries-per-client 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import workloads  # noqa: F401  (sets up sys.path)
+from calc import process_vector_query
+from query_service import DEFAULT_BATCH_WINDOW, DEFAULT_MAX_BATCH_SIZE, VectorQueryService
+
+
+async def _client(service, queries, latencies):
+    for query in queries:
+        start = time.perf_counter()
+        await service.submit(query)
+        latencies.append(time.perf_counter() - start)
+
+
+async def _load_test(queries, clients, batch_window, max_batch_size, max_queue_depth):
+    per_client = [queries[i::clients] for i in range(clients)]
+    latencies = []
+    async with VectorQueryService(batch_window, max_batch_size, max_queue_depth) as service:
+        start = time.perf_counter()
+        await asyncio.gather(*(_client(service, client_queries, latencies) for client_queries in per_client))
+        elapsed = time.perf_counter() - start
+        stats = service.stats()
+    return elapsed, latencies, stats
+
+
+def _percentiles(latencies):
+    cuts = statistics.quantiles(latencies, n=100)
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98], "max": max(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--queries-per-client", type=int, default=20)
+    parser.add_argument("--batch-window", type=float, default=DEFAULT_BATCH_WINDOW)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-queue-depth", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    queries = workloads.query_corpus(args.clients * args.queries_per_client, seed=args.seed)
+
+    start = time.perf_counter()
+    for query in queries:
+        process_vector_query(query)
+    sequential = time.perf_counter() - start
+
+    elapsed, latencies, stats = asyncio.run(_load_test(
+        queries, args.clients, args.batch_window, args.max_batch_size, args.max_queue_depth))
+
+    print(f"{len(queries)} queries from {args.clients} concurrent clients")
+    print(f"  sequential process_vector_query: {len(queries) / sequential:>10,.0f} queries/s")
+    print(f"  VectorQueryService:              {len(queries) / elapsed:>10,.0f} queries/s")
+    print(f"  batches: {stats['batches']}, mean size {stats['mean_batch_size']:.1f}, largest {stats['largest_batch']}")
+    print("  latency " + ", ".join(f"{name} {value * 1e3:.2f} ms" for name, value in _percentiles(latencies).items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark suite for the vectors subsystem: throughput of each Vector method,
+of process_vector_query for each operation label, and of the batch engine on
+a mixed corpus. Run it through run_benchmarks.py:
+
+    python benchmarks/run_benchmarks.py --suite vectors
+"""
+import random
+
+import workloads
+from batch_query import process_vector_queries
+from calc import Vector, process_vector_query
+
+DEFAULT_SIZES = [20_000]
+
+ONE_VECTOR_METHODS = ["modulus", "unit_vector"]
+TWO_VECTOR_METHODS = ["add", "subtract", "dot_product", "cross_product", "angle",
+                      "length_of_proj", "projection_vector", "distance"]
+QUERY_OPERATIONS = workloads.ONE_VECTOR_OPERATIONS + workloads.TWO_VECTOR_OPERATIONS + ["scalar_multiplication"]
+
+
+def cases(sizes=None):
+    """Case list; sizes are the numbers of operations per timed call."""
+    result = []
+    for n in sizes or DEFAULT_SIZES:
+        result += [("vector_method", {"method": method, "n": n})
+                   for method in ONE_VECTOR_METHODS + ["multiply"] + TWO_VECTOR_METHODS]
+        result += [("process_vector_query", {"operation": operation, "n": n}) for operation in QUERY_OPERATIONS]
+        result.append(("process_vector_queries", {"n": n}))
+    return result
+
+
+def _random_vectors(rng, n):
+    # Never the zero vector, so unit_vector/angle/projections do not raise
+    return [Vector(rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(1, 10)) for _ in range(n)]
+
+
+def setup(name, params, seed=0):
+    rng = random.Random(seed)
+    n = params["n"]
+
+    if name == "vector_method":
+        method = params["method"]
+        first, second = _random_vectors(rng, n), _random_vectors(rng, n)
+        if method in ONE_VECTOR_METHODS:
+            bound = [getattr(a, method) for a in first]
+            return (lambda: [call() for call in bound]), n
+        if method == "multiply":
+            return (lambda: [a.multiply(2.5) for a in first]), n
+        function = getattr(Vector, method)
+        return (lambda: [function(a, b) for a, b in zip(first, second)]), n
+
+    if name == "process_vector_query":
+        queries = workloads.query_corpus(n, seed=seed, error_rate=0, operations=[params["operation"]])
+        return (lambda: [process_vector_query(query) for query in queries]), n
+
+    if name == "process_vector_queries":
+        queries = workloads.query_corpus(n, seed=seed)
+        return (lambda: process_vector_queries(queries)), n
+
+    raise ValueError(f"unknown vectors case {name!r}")
@@ -0,0 +1,106 @@
+"""
+Checks that each VectorArray operation gives what the same Vector method gives,
+row by row, on the vectors of the seeded synthetic corpus.
+
+    python benchmarks/check_equivalence.py --queries 20000
+
+Exits with an error if any check finds a mismatch.
+"""
+import argparse
+
+import numpy as np
+
+import workloads  # noqa: F401  (sets up sys.path)
+from calc import Vector, new_output_data, parse_query
+from vector_array import VectorArray
+
+# Vectors the corpus rarely or never produces: signed zeros, overflow, subnormals, parallel pairs
+EDGE_CASES = [
+    "[[-0.0, 1, 2], [0, -0.0, 0], 'addition']", "[[1e400, 0, 0], [1, 2, 3], 'dot_product']",
+    "[[1e-320, 0, 0], [1e-320, 1e-320, 0], 'angle']", "[[1.5e-3, 2E+2, 3], [0, 0, 0], 'distance']",
+    "[[1, 2, 3], [-1, -2, -3], 'angle']", "[[1, 2], [2, 4], 'projection_vector']",
+]
+
+ONE_VECTOR_OPERATIONS = ["modulus", "unit_vector"]
+TWO_VECTOR_OPERATIONS = ["add", "subtract", "dot_product", "cross_product", "angle", "length_of_proj",
+                         "projection_vector", "distance"]
+# VectorArray.angle uses np.arccos, which may differ from math.acos in the last bit
+TOLERANCES = {"angle": 1e-12}
+
+
+def _scalar_outcome(method, vector, args):
+    """The result of a Vector method as plain floats, or None if it raised ValueError."""
+    try:
+        result = method(vector, *args)
+    except ValueError:
+        return None
+    return (result.x, result.y, result.z) if isinstance(result, Vector) else result
+
+
+def _batch_outcomes(result):
+    """The rows of a VectorArray method's result as plain floats, with None for masked rows."""
+    mask = None
+    if isinstance(result, tuple):
+        result, mask = result
+    rows = [tuple(row) for row in result.data.tolist()] if isinstance(result, VectorArray) else result.tolist()
+    if mask is not None:
+        rows = [None if masked else row for row, masked in zip(rows, mask.tolist())]
+    return rows
+
+
+def _same(expected, actual, tolerance=0.0):
+    if expected is None or actual is None:
+        return expected is actual
+    if isinstance(expected, tuple):
+        return all(_same(e, a, tolerance) for e, a in zip(expected, actual))
+    return repr(expected) == repr(actual) or abs(expected - actual) <= tolerance
+
+
+def check_vector_array(queries):
+    """Returns {operation: mismatch count} for VectorArray against Vector, on the corpus's vectors."""
+    components = []
+    for query in queries:
+        try:
+            components.extend(parse_query(query, new_output_data())[2])
+        except (ValueError, SyntaxError, TypeError):
+            pass
+    vectors = [Vector(*row) for row in components]
+    others = vectors[1:] + vectors[:1]
+    scalars = [other.x for other in others]
+    a, b = VectorArray(components), VectorArray.from_vectors(others)
+
+    cases = [(name, [()] * len(vectors), ()) for name in ONE_VECTOR_OPERATIONS]
+    cases.append(("multiply", [(scalar,) for scalar in scalars], (scalars,)))
+    cases += [(name, [(other,) for other in others], (b,)) for name in TWO_VECTOR_OPERATIONS]
+
+    mismatches = {}
+    for name, row_args, batch_args in cases:
+        method = getattr(Vector, name)
+        expected = [_scalar_outcome(method, vector, args) for vector, args in zip(vectors, row_args)]
+        with np.errstate(invalid="ignore", over="ignore"):  # inf components, as in the scalar path
+            actual = _batch_outcomes(getattr(a, name)(*batch_args))
+        tolerance = TOLERANCES.get(name, 0.0)
+        mismatches[f"VectorArray.{name}"] = sum(not _same(e, r, tolerance) for e, r in zip(expected, actual))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    queries = workloads.query_corpus(args.queries, seed=args.seed) + EDGE_CASES
+
+    mismatches = check_vector_array(queries)
+    print(f"{len(queries)} queries, seed {args.seed}")
+    for name, count in mismatches.items():
+        print(f"  {name + ':':42} {count} mismatches")
+
+    failed = {name: count for name, count in mismatches.items() if count}
+    if failed:
+        raise SystemExit(f"{sum(failed.values())} mismatches in {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
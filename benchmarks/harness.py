@@ -0,0 +1,226 @@
+"""
+Measurement harness shared by the benchmark suites.
+
+Each case runs in a fresh child process, so peak RSS belongs to that case alone
+and one case's caches and garbage cannot affect the next. A suite module
+defines:
+
+    cases(sizes)        -> list of (case_name, params) to run
+    setup(name, params) -> (run, ops): a zero-argument callable to time, and the
+                           number of operations one call of it performs
+
+Results are saved as JSON and can be compared against a baseline file.
+Optionally each case also writes a cProfile file (view it with
+python -m pstats, snakeviz, etc.).
+"""
+import cProfile
+import datetime
+import gc
+import importlib
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import workloads
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_FORMAT_VERSION = 1
+DEFAULT_THRESHOLD = 0.10  # Flag cases more than 10% slower (or bigger) than the baseline
+
+
+def _reset_peak_rss():
+    """Resets the kernel's peak-RSS counter for this process (Linux only). Returns whether it worked."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _status_bytes(field):
+    """Reads a memory field such as VmRSS from /proc/self/status, or None where there is no procfs."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_bytes():
+    peak = _status_bytes("VmHWM")
+    if peak is not None:
+        return peak
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024  # bytes on macOS, KiB elsewhere
+
+
+def measure(run, ops=1, repeat=3):
+    """
+    Times run() repeat times, then calls it once more under tracemalloc to
+    record Python allocations (tracemalloc slows the call down, so that call
+    is not timed).
+
+    Returns a dict of wall time (best and median), throughput, peak RSS and
+    traced allocation peak. Peak RSS covers only the timed calls where the
+    platform allows the counter to be reset, and the whole process otherwise
+    (rss_includes_setup); start_rss_mb is the RSS after imports and setup.
+    """
+    gc.collect()
+    start_rss = _status_bytes("VmRSS")
+    rss_reset = _reset_peak_rss()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    peak_rss = _peak_rss_bytes()
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(times)
+    return {
+        "ops": ops,
+        "repeat": repeat,
+        "wall_s": best,
+        "median_wall_s": statistics.median(times),
+        "ops_per_s": ops / best if best > 0 else float("inf"),
+        "us_per_op": best / ops * 1e6,
+        "peak_rss_mb": peak_rss / 2**20,
+        "start_rss_mb": start_rss / 2**20 if start_rss is not None else None,
+        "rss_includes_setup": not rss_reset,
+        "alloc_peak_mb": alloc_peak / 2**20,
+    }
+
+
+def run_case(suite, name, params, repeat, profile_dir=None):
+    """
+    Runs one case in a child process and returns its result record. With
+    profile_dir, the child also saves a cProfile of one extra call there.
+    """
+    command = [sys.executable, os.path.join(BENCHMARKS_DIR, "harness.py"), "--child",
+               suite, name, json.dumps(params), str(repeat), profile_dir or ""]
+    env = dict(os.environ, MPLBACKEND="Agg")
+    completed = subprocess.run(command, capture_output=True, text=True, env=env)
+    record = {"suite": suite, "case": name, "params": params}
+    if completed.returncode != 0:
+        record["error"] = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"
+        return record
+    record.update(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return record
+
+
+def run_suite(suite, sizes=None, repeat=3, profile_dir=None, log=sys.stderr):
+    """Runs every case of the suite module named suite and returns the result records."""
+    module = importlib.import_module(suite)
+    records = []
+    for name, params in module.cases(sizes):
+        record = run_case(suite, name, params, repeat, profile_dir)
+        records.append(record)
+        if log is not None:
+            print(format_record(record), file=log, flush=True)
+    return records
+
+
+def format_record(record):
+    label = f"{record['suite']}:{record['case']} {json.dumps(record['params'], sort_keys=True)}"
+    if "error" in record:
+        return f"{label:<72} ERROR {record['error']}"
+    return (f"{label:<72} {record['wall_s']:>9.4f}s {record['ops_per_s']:>14,.0f} ops/s "
+            f"rss {record['peak_rss_mb']:>8.1f} MB  alloc {record['alloc_peak_mb']:>8.1f} MB")
+
+
+def environment():
+    """Describes the machine and library versions, stored alongside the results."""
+    import numpy
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=workloads.REPO_ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(path, records):
+    with open(path, "w") as f:
+        json.dump({"format_version": RESULTS_FORMAT_VERSION, "environment": environment(),
+                   "results": records}, f, indent=2)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def _case_key(record):
+    return record["suite"], record["case"], json.dumps(record["params"], sort_keys=True)
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares two lists of result records case by case.
+
+    Returns a list of (case_key, metric, baseline_value, current_value, ratio)
+    for every metric (wall_s, peak_rss_mb, alloc_peak_mb) that got worse by
+    more than threshold, plus any case that errored now but not before.
+    """
+    baseline_by_key = {_case_key(record): record for record in baseline}
+    regressions = []
+    for record in current:
+        key = _case_key(record)
+        before = baseline_by_key.get(key)
+        if before is None or "error" in before:
+            continue
+        if "error" in record:
+            regressions.append((key, "error", None, record["error"], None))
+            continue
+        for metric in ("wall_s", "peak_rss_mb", "alloc_peak_mb"):
+            if before[metric] > 0 and record[metric] / before[metric] > 1 + threshold:
+                regressions.append((key, metric, before[metric], record[metric], record[metric] / before[metric]))
+    return regressions
+
+
+def _profile_path(profile_dir, suite, name, params):
+    suffix = "_".join(f"{key}-{value}" for key, value in sorted(params.items()))
+    return os.path.join(profile_dir, f"{suite}.{name}.{suffix}.prof")
+
+
+def _child_main(suite, name, params, repeat, profile_dir):
+    module = importlib.import_module(suite)
+    params = json.loads(params)
+    run, ops = module.setup(name, params)
+    result = measure(run, ops, int(repeat))
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        profiler = cProfile.Profile()
+        profiler.runcall(run)
+        result["profile"] = _profile_path(profile_dir, suite, name, params)
+        profiler.dump_stats(result["profile"])
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 7 and sys.argv[1] == "--child":
+        _child_main(*sys.argv[2:])
+    else:
+        sys.exit("harness.py is run by run_benchmarks.py")
@@ -0,0 +1,54 @@
+"""
+Runs the benchmark suites, saves the results as JSON and optionally flags
+regressions against an earlier results file.
+
+    python benchmarks/run_benchmarks.py --output baseline.json
+    python benchmarks/run_benchmarks.py --suite clustering --sizes 1000 100000 --output new.json --baseline baseline.json
+
+Every case runs in its own process; see harness.py for what is measured. The
+exit status is 1 if any regression is flagged.
+"""
+import argparse
+import sys
+
+import harness
+
+SUITES = {"vectors": "bench_vectors", "clustering": "bench_clustering"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", choices=[*SUITES, "all"], default="all")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        help="operations per call (vectors) or students (clustering); default per suite")
+    parser.add_argument("--repeat", type=int, default=3, help="timed calls per case; the best is kept (default 3)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--profile-dir", help="also save a cProfile of each case to this directory")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=harness.DEFAULT_THRESHOLD,
+                        help=f"relative slowdown/growth flagged as a regression (default {harness.DEFAULT_THRESHOLD})")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    suites = list(SUITES) if args.suite == "all" else [args.suite]
+    records = []
+    for suite in suites:
+        records += harness.run_suite(SUITES[suite], args.sizes, args.repeat, args.profile_dir)
+    if args.output:
+        harness.save_results(args.output, records)
+
+    if args.baseline is None:
+        return 0
+    regressions = harness.compare(harness.load_results(args.baseline), records, args.threshold)
+    for (suite, case, params), metric, before, after, ratio in regressions:
+        if metric == "error":
+            print(f"REGRESSION {suite}:{case} {params}: now fails ({after})")
+        else:
+            print(f"REGRESSION {suite}:{case} {params}: {metric} {before:.4g} -> {after:.4g} ({ratio:.2f}x)")
+    print(f"{len(regressions)} regression(s) against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
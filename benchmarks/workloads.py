@@ -0,0 +1,58 @@
+"""Seeded synthetic workloads shared by the benchmark scripts."""
+import random
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+VECTORS_DIR = REPO_ROOT / "vectors" / "vectors_calculation"
+CLUSTER_DIR = REPO_ROOT / "cluster_analysis"
+
+# The repo's modules are plain scripts rather than packages, so make them importable.
+for path in (VECTORS_DIR, CLUSTER_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+ONE_VECTOR_OPERATIONS = ["vector", "magnitude", "unit_vector"]
+TWO_VECTOR_OPERATIONS = ["addition", "subtract", "dot_product", "cross_product", "angle",
+                         "length_of_proj", "projection_vector", "distance"]
+
+
+def _random_vector(rng, zero_rate):
+    if rng.random() < zero_rate:
+        return [0, 0, 0]
+    size = 3 if rng.random() < 0.8 else 2
+    return [rng.choice([rng.randint(-9, 9), round(rng.uniform(-10, 10), 2)]) for _ in range(size)]
+
+
+def query_string(operation, rng, zero_rate=0.02):
+    """Returns one query string for operation in the format the AI produces."""
+    if operation in ONE_VECTOR_OPERATIONS:
+        items = [_random_vector(rng, zero_rate)]
+    elif operation == "scalar_multiplication":
+        items = [_random_vector(rng, zero_rate), rng.randint(-5, 5)]
+    elif operation == "vectors":
+        items = [_random_vector(rng, zero_rate) for _ in range(rng.randint(1, 3))]
+    else:
+        items = [_random_vector(rng, zero_rate), _random_vector(rng, zero_rate)]
+    return str(items + [operation])
+
+
+def query_corpus(n, seed=0, error_rate=0.05, operations=None):
+    """
+    Returns n query strings. About error_rate of them are malformed, use an
+    unknown operation or have the wrong number of vectors.
+    """
+    rng = random.Random(seed)
+    operations = operations or ONE_VECTOR_OPERATIONS + TWO_VECTOR_OPERATIONS + ["scalar_multiplication", "vectors"]
+    queries = []
+    for _ in range(n):
+        query = query_string(rng.choice(operations), rng)
+        if rng.random() < error_rate:
+            query = rng.choice([
+                query[:-1],                                    # truncated
+                query.replace("'", "'unknown_", 1),            # unsupported operation
+                str([_random_vector(rng, 0), "cross_product"]), # wrong arity
+                str([[1, 2, 3, 4], "magnitude"]),              # too many components
+            ])
+        queries.append(query)
+    return queries
@@ -0,0 +1,52 @@
+import json
+import os
+
+import numpy as np
+
+METADATA_FILE = 'metadata.json'
+
+
+def save_arrays(directory, arrays, metadata, format_version):
+    """
+    Writes each array as <name>.npy in directory (created if needed), and
+    metadata, tagged with format_version, as metadata.json.
+
+    The old metadata is removed first and the new one written last, so an
+    interrupted write leaves nothing that read_metadata() accepts.
+
+    Args:
+        directory: Directory to write to.
+        arrays: Mapping of file name (without .npy) to array.
+        metadata: JSON-serializable dict.
+        format_version: Version of the caller's layout; bump it when that changes.
+    """
+    os.makedirs(directory, exist_ok=True)
+    metadata_path = os.path.join(directory, METADATA_FILE)
+    if os.path.exists(metadata_path):
+        os.remove(metadata_path)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f'{name}.npy'), array)
+    with open(metadata_path, 'w') as f:
+        json.dump({**metadata, 'format_version': format_version}, f, indent=2)
+
+
+def read_metadata(directory, format_version):
+    """
+    Returns the metadata saved in directory by save_arrays().
+
+    Raises:
+        OSError: If there is no metadata (nothing saved, or an interrupted write).
+        ValueError: If it is unreadable, or was written with another format_version.
+    """
+    with open(os.path.join(directory, METADATA_FILE)) as f:
+        metadata = json.load(f)
+    if metadata.get('format_version') != format_version:
+        raise ValueError(f"Unsupported format version {metadata.get('format_version')!r} in {directory} "
+                         f"(expected {format_version}).")
+    return metadata
+
+
+def load_arrays(directory, names, mmap=()):
+    """Loads the arrays saved in directory by save_arrays(); those named in mmap are memory-mapped read-only."""
+    return [np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r' if name in mmap else None)
+            for name in names]
@@ -1,29 +1,37 @@
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import PCA, IncrementalPCA
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from cluster_model import save_model
+from student_io import load_student_data
+from cluster_stats import cluster_feedback, cluster_statistics, render_cluster_report
+
 # --- 1. Data Representation and Preprocessing ---
 
-def preprocess_data(data_path):
+def preprocess_data(data_path, cache_dir=None, dtype=np.float32):
     """
     Preprocesses the student data from a CSV file.
 
     Args:
         data_path: Path to the CSV file containing student data.
+        cache_dir: Optional directory for a binary cache of the parsed CSV
+            (see student_io.load_student_data), so later runs skip parsing.
+        dtype: Float dtype of the scaled features.
 
     Returns:
         A pandas DataFrame ready for clustering.
     """
-    df = pd.read_csv(data_path)  # Read data directly from CSV
+    df = load_student_data(data_path, cache_dir)  # uint8 scores, categorical Student names
 
     # No need for one-hot encoding since all columns are numerical
 
     # Separate numerical features
     numerical_cols = [col for col in df.columns if col != 'Student']
-    numerical_data = df[numerical_cols]
+    numerical_data = df[numerical_cols].astype(dtype)
 
     # Scale numerical features
     scaler = StandardScaler()
@@ -51,82 +59,216 @@ def cluster_students(df, num_clusters=5):
     kmeans = KMeans(n_clusters=num_clusters, random_state=42)
     df['Cluster'] = kmeans.fit_predict(numerical_df)
     return df, kmeans  # Return the trained KMeans model
+
+def cluster_students_streaming(data_path, output_path, num_clusters=5, chunksize=100_000,
+                               n_epochs=3, sample_size=20_000, random_state=42):
+    """
+    Clusters students from a CSV too large to hold in memory, reading it in chunks.
+
+    The scaler is fitted with partial_fit in a first pass, which also keeps a
+    uniform random sample of rows used to initialise the centroids (the data
+    may be sorted, e.g. by profile, so the first chunk is not representative).
+    MiniBatchKMeans is then trained with partial_fit over n_epochs further
+    passes, and a final pass writes each student's cluster to output_path.
+    Only one chunk is in memory at a time.
+
+    Args:
+        data_path: Path to the CSV file containing student data.
+        output_path: CSV file to write 'Student' and 'Cluster' columns to.
+        num_clusters: The desired number of student clusters.
+        chunksize: Rows read per chunk.
+        n_epochs: Passes over the data for mini-batch training.
+        sample_size: Rows kept for centroid initialisation.
+        random_state: Seed for sampling and clustering.
+
+    Returns:
+        The fitted StandardScaler and MiniBatchKMeans model.
+    """
+    rng = np.random.default_rng(random_state)
+    scaler = StandardScaler()
+    sample, sample_keys = None, None
+
+    for chunk in pd.read_csv(data_path, chunksize=chunksize):
+        numerical_data = chunk.drop('Student', axis=1)
+        scaler.partial_fit(numerical_data)
+        # Keep the rows with the smallest random keys seen so far: a uniform sample
+        keys = rng.random(len(chunk))
+        if sample is not None:
+            numerical_data = pd.concat([sample, numerical_data], ignore_index=True)
+            keys = np.concatenate([sample_keys, keys])
+        if len(keys) > sample_size:
+            keep = np.argpartition(keys, sample_size)[:sample_size]
+            numerical_data, keys = numerical_data.iloc[keep].reset_index(drop=True), keys[keep]
+        sample, sample_keys = numerical_data, keys
+
+    if sample is None or len(sample) < num_clusters:
+        raise ValueError(f"Need at least {num_clusters} students to form {num_clusters} clusters.")
+
+    initial_centers = KMeans(n_clusters=num_clusters, random_state=random_state).fit(
+        scaler.transform(sample)).cluster_centers_
+    # No random reassignment of small clusters: with sorted chunks a cluster can legitimately
+    # receive no students for a while, and reassigning it would throw away a good centroid
+    kmeans = MiniBatchKMeans(n_clusters=num_clusters, init=initial_centers, n_init=1,
+                             reassignment_ratio=0, random_state=random_state)
+    for _ in range(n_epochs):
+        for chunk in pd.read_csv(data_path, chunksize=chunksize):
+            kmeans.partial_fit(scaler.transform(chunk.drop('Student', axis=1)))
+
+    for i, chunk in enumerate(pd.read_csv(data_path, chunksize=chunksize)):
+        assignments = chunk[['Student']].copy()
+        assignments['Cluster'] = kmeans.predict(scaler.transform(chunk.drop('Student', axis=1)))
+        assignments.to_csv(output_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+
+    return scaler, kmeans
 # --- 3. Visualization (PCA) ---
 
-def visualize_clusters(df):
+def visualize_clusters(df, output_path=None):
     """
     Visualizes the clusters using PCA for dimensionality reduction.
+    If output_path is given, the figure is saved there instead of being shown.
     """
     pca = PCA(n_components=2)
     reduced_data = pca.fit_transform(df.drop(['Student', 'Cluster'], axis=1))
     reduced_df = pd.DataFrame(reduced_data, columns=['PCA1', 'PCA2'])
     reduced_df['Cluster'] = df['Cluster']
 
-    plt.figure(figsize=(10, 6))
+    fig = plt.figure(figsize=(10, 6))
     sns.scatterplot(x='PCA1', y='PCA2', hue='Cluster', data=reduced_df, palette='viridis')
     plt.title('Student Clusters (PCA Visualization)')
-    plt.show()
+    if output_path is None:
+        plt.show()
+    else:
+        fig.savefig(output_path)
+    plt.close(fig)
+
+def _stratified_sample(labels, per_cluster, rng):
+    """Returns sorted row indices holding at most per_cluster random rows of each cluster."""
+    order = np.argsort(labels, kind='stable')
+    boundaries = np.flatnonzero(np.diff(labels[order])) + 1
+    indices = [members if len(members) <= per_cluster else rng.choice(members, per_cluster, replace=False)
+               for members in np.split(order, boundaries)]
+    return np.sort(np.concatenate(indices))
+
+def visualize_clusters_scalable(df, output_path, mode='sample', sample_per_cluster=2_000,
+                                fit='sample', bins=150, chunksize=100_000, random_state=42):
+    """
+    Visualizes clusters of any size with PCA and saves the figure to output_path
+    without opening a window, so it can run headless.
+
+    The projection is fitted with randomized PCA on a stratified sample of
+    sample_per_cluster students per cluster (fit='sample'), or with
+    IncrementalPCA over chunks of every student (fit='incremental').
+
+    Args:
+        df: DataFrame with 'Student', 'Cluster' and the scaled topic columns.
+        output_path: Image file to write.
+        mode: 'sample' draws a scatter of the stratified sample; 'density' bins
+            every student into a bins x bins 2D histogram, one panel per cluster.
+        sample_per_cluster: Students per cluster used for the sample.
+        fit: 'sample' or 'incremental'.
+        bins: Histogram resolution for mode='density'.
+        chunksize: Rows projected (and, with fit='incremental', fitted) at a time.
+        random_state: Seed for sampling and PCA.
+
+    Returns:
+        The fitted PCA (or IncrementalPCA) model.
+    """
+    if mode not in ('sample', 'density'):
+        raise ValueError(f"mode must be 'sample' or 'density', not {mode!r}")
+    if fit not in ('sample', 'incremental'):
+        raise ValueError(f"fit must be 'sample' or 'incremental', not {fit!r}")
+
+    feature_columns = [col for col in df.columns if col not in ('Student', 'Cluster')]
+    labels = df['Cluster'].to_numpy()
+    sample_rows = _stratified_sample(labels, sample_per_cluster, np.random.default_rng(random_state))
+    sample = df[feature_columns].iloc[sample_rows].to_numpy(dtype=np.float64)
+
+    if fit == 'sample':
+        pca = PCA(n_components=2, svd_solver='randomized', random_state=random_state).fit(sample)
+    else:
+        pca = IncrementalPCA(n_components=2, batch_size=max(chunksize, 2))
+        for start in range(0, len(df), chunksize):
+            chunk = df[feature_columns].iloc[start:start + chunksize].to_numpy(dtype=np.float64)
+            if len(chunk) >= 2:  # partial_fit needs at least n_components rows
+                pca.partial_fit(chunk)
+
+    clusters = np.unique(labels)
+    if mode == 'sample':
+        reduced_df = pd.DataFrame(pca.transform(sample), columns=['PCA1', 'PCA2'])
+        reduced_df['Cluster'] = labels[sample_rows]
+        fig = plt.figure(figsize=(10, 6))
+        sns.scatterplot(x='PCA1', y='PCA2', hue='Cluster', data=reduced_df, palette='viridis',
+                        s=8, linewidth=0, alpha=0.6)
+        plt.title(f'Student Clusters (PCA, up to {sample_per_cluster:,} students per cluster)')
+    else:
+        reduced = np.empty((len(df), 2))
+        for start in range(0, len(df), chunksize):
+            chunk = df[feature_columns].iloc[start:start + chunksize].to_numpy(dtype=np.float64)
+            reduced[start:start + len(chunk)] = pca.transform(chunk)
+        # One histogram over (PCA1, PCA2, cluster) bins every student in a single pass
+        label_edges = np.append(clusters, clusters[-1] + 1) - 0.5
+        counts, (x_edges, y_edges, _) = np.histogramdd(
+            (reduced[:, 0], reduced[:, 1], labels), bins=(bins, bins, label_edges))
+        extent = (x_edges[0], x_edges[-1], y_edges[0], y_edges[-1])
+
+        columns = min(len(clusters), 3)
+        rows = -(-len(clusters) // columns)
+        fig, axes = plt.subplots(rows, columns, figsize=(4 * columns, 3.5 * rows),
+                                 sharex=True, sharey=True, squeeze=False, layout='constrained')
+        for ax, cluster_num, cluster_counts in zip(axes.flat, clusters, np.moveaxis(counts, 2, 0)):
+            ax.imshow(np.log1p(cluster_counts.T), origin='lower', extent=extent, aspect='auto', cmap='viridis')
+            ax.set_title(f'Cluster {cluster_num} ({int(cluster_counts.sum()):,} students)')
+        for ax in axes.flat[len(clusters):]:
+            ax.axis('off')
+        fig.supxlabel('PCA1')
+        fig.supylabel('PCA2')
+        fig.suptitle('Student Clusters (PCA density, log scale)')
+
+    fig.savefig(output_path)
+    plt.close(fig)
+    return pca
 # --- 4. Cluster Analysis and Feedback ---
 
 def analyze_clusters(df):
     """
     Analyzes the characteristics of each cluster and provides feedback,
     including mean, standard deviation, and range.
+
+    Returns:
+        The per-cluster, per-topic statistics table and the feedback records
+        (see cluster_stats), which are also printed as a report.
     """
-    topics = df.columns.drop(['Student', 'Cluster'])  # Get the list of topics
-
-    for cluster_num in sorted(df['Cluster'].unique()):
-        cluster_data = df[df['Cluster'] == cluster_num]
-        print(f"\n--- Cluster {cluster_num} Analysis ---")
-
-        # Calculate mean, standard deviation, and range for each topic
-        cluster_means = cluster_data.drop(['Student', 'Cluster'], axis=1).mean()
-        cluster_stds = cluster_data.drop(['Student', 'Cluster'], axis=1).std()
-        cluster_ranges = (
-            cluster_data.drop(['Student', 'Cluster'], axis=1).max()
-            - cluster_data.drop(['Student', 'Cluster'], axis=1).min()
-        )
-
-        # Print the statistics
-        for topic in topics:
-            print(f"\n  {topic}:")
-            print(f"    Mean: {cluster_means[topic]:.2f}")
-            print(f"    Standard Deviation: {cluster_stds[topic]:.2f}")
-            print(f"    Range: {cluster_ranges[topic]:.2f}")
-
-        # Example feedback
-        for topic in topics:
-            if cluster_means[topic] < 0:  # Below average performance (due to scaling)
-                print(f"  Students in this cluster could improve on {topic}.")
-                if cluster_stds[topic] > 0.8: # Threshold
-                    print(f"    Note: There is high variability in {topic} scores within this cluster.")
-
-            if cluster_means[topic] >= 0.5:
-                print(f"  Students in this cluster are strong on {topic}.")
-
-        #Identify topics with the highest/lowest standard deviation within a cluster
-        highest_std_topic = cluster_stds.idxmax()
-        lowest_std_topic = cluster_stds.idxmin()
-        print(f"\n  Highest standard deviation in this cluster: {highest_std_topic}")
-        print(f"  Lowest standard deviation in this cluster: {lowest_std_topic}")
+    stats = cluster_statistics(df)
+    feedback = cluster_feedback(stats)
+    print(render_cluster_report(stats, feedback))
+    return stats, feedback
     # --- 5. Main Program and Workflow ---
 
-def main():
+def main(data_path='student_data.csv', model_dir=None, plot_path=None):
     # Load data
-    data_path = 'student_data.csv'
     preprocessed_df, scaler = preprocess_data(data_path)
 
     # Clustering
     clustered_df, kmeans_model = cluster_students(preprocessed_df.copy())
 
-    # Visualization
-    visualize_clusters(clustered_df.copy())
+    # Visualization (saved to plot_path without opening a window, if given)
+    if plot_path is None:
+        visualize_clusters(clustered_df.copy())
+    else:
+        visualize_clusters_scalable(clustered_df, plot_path)
 
     # Cluster analysis and feedback
     analyze_clusters(clustered_df)
 
+    # Save the scaler and model, if asked, so new cohorts can be scored without retraining
+    if model_dir is not None:
+        feature_columns = [col for col in preprocessed_df.columns if col != 'Student']
+        save_model(model_dir, scaler, kmeans_model, feature_columns)
+
+    return scaler, kmeans_model
+
 # Function to predict cluster assignment for newer student data
-def predict_cluster(new_data_path, scaler, kmeans_model):
+def predict_cluster(new_data_path, scaler, kmeans_model, cache_dir=None):
     """
     Predicts the cluster assignment for new student data.
 
@@ -134,12 +276,13 @@ def predict_cluster(new_data_path, scaler, kmeans_model):
         new_data_path: Path to the CSV file containing new student data.
         scaler: The StandardScaler object used to preprocess the training data.
         kmeans_model: The trained KMeans model.
+        cache_dir: Optional directory for a binary cache of the parsed CSV.
 
     Returns:
         DataFrame with cluster assignments for new data.
     """
-    new_df = pd.read_csv(new_data_path)
-    new_numerical_data = new_df.drop('Student', axis=1)
+    new_df = load_student_data(new_data_path, cache_dir)
+    new_numerical_data = new_df.drop('Student', axis=1).astype(kmeans_model.cluster_centers_.dtype)
     new_scaled_data = scaler.transform(new_numerical_data)  # Use the SAME scaler
     new_scaled_df = pd.DataFrame(new_scaled_data, columns=new_numerical_data.columns)
     new_df['Cluster'] = kmeans_model.predict(new_scaled_df)
@@ -148,6 +291,15 @@ def predict_cluster(new_data_path, scaler, kmeans_model):
 # Example usage
 # new_clustered_df = predict_cluster('new_student_data.csv', scaler, kmeans_model)
 # print(new_clustered_df)
+#
+# Or, with the model saved by main(model_dir='cluster_model'), without retraining
+# (from cluster_model import load_model):
+# new_clustered_df = load_model('cluster_model').predict_csv('new_student_data.csv')
+#
+# Or, to fold a new term's scores (new students, or a new test column) into the
+# clustering without rerunning main(), see incremental_clustering:
+# IncrementalClusterer.from_csv('student_data.csv').save('cluster_state')   # once
+# update_clusters('cluster_state', 'class_test_4.csv')                       # each term
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,154 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from array_store import load_arrays, read_metadata, save_arrays
+
+MODEL_FORMAT_VERSION = 1  # Of the bundle save() writes
+
+
+class ClusterModel:
+    """
+    A trained scaler + k-means bundle that can be saved, reloaded and used to
+    assign clusters without retraining.
+
+    Only the arrays prediction needs are kept (scaler mean/scale and the
+    centroids), as .npy files next to a metadata.json, so loading needs neither
+    pickle nor scikit-learn. Centroids are memory-mapped on load.
+
+    Usage:
+        ClusterModel.from_fitted(scaler, kmeans_model, feature_columns).save('model/')
+        model = ClusterModel.load('model/')
+        new_df['Cluster'] = model.predict(new_df)
+    """
+
+    def __init__(self, feature_columns, mean, scale, centroids, metadata=None):
+        self.feature_columns = list(feature_columns)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.centroids = centroids
+        # ||c||^2 for each centroid, so distances need one matrix product per batch
+        self.centroid_sq_norms = np.einsum('ij,ij->i', centroids, centroids)
+        self.metadata = metadata or {}
+        if not (len(self.feature_columns) == len(self.mean) == len(self.scale) == centroids.shape[1]):
+            raise ValueError("Feature columns, scaler and centroids have inconsistent sizes.")
+
+    @property
+    def num_clusters(self):
+        return len(self.centroids)
+
+    @classmethod
+    def from_fitted(cls, scaler, kmeans_model, feature_columns):
+        """
+        Builds a ClusterModel from a fitted StandardScaler and (MiniBatch)KMeans.
+
+        Args:
+            scaler: The StandardScaler object used to preprocess the training data.
+            kmeans_model: The trained KMeans model.
+            feature_columns: Feature column names, in the order the scaler was fitted on.
+        """
+        metadata = {
+            'feature_columns': list(feature_columns),
+            'num_clusters': int(kmeans_model.n_clusters),
+            'model_type': type(kmeans_model).__name__,
+            'fitted_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        }
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(len(feature_columns))
+        return cls(feature_columns, scaler.mean_, scale,
+                   np.asarray(kmeans_model.cluster_centers_, dtype=np.float64), metadata)
+
+    def save(self, model_dir):
+        """Writes the bundle to model_dir (created if needed)."""
+        arrays = {'centroids': np.ascontiguousarray(self.centroids), 'scaler_mean': self.mean,
+                  'scaler_scale': self.scale}
+        save_arrays(model_dir, arrays, self.metadata, MODEL_FORMAT_VERSION)
+
+    @classmethod
+    def load(cls, model_dir, mmap=True):
+        """Loads a bundle written by save(). Centroids are memory-mapped unless mmap is False."""
+        metadata = read_metadata(model_dir, MODEL_FORMAT_VERSION)
+        centroids, mean, scale = load_arrays(model_dir, ['centroids', 'scaler_mean', 'scaler_scale'],
+                                             mmap={'centroids'} if mmap else ())
+        return cls(metadata['feature_columns'], mean, scale, centroids, metadata)
+
+    def _feature_matrix(self, data):
+        """Returns data as a float64 matrix with columns in feature_columns order."""
+        if isinstance(data, pd.DataFrame):
+            missing = [col for col in self.feature_columns if col not in data.columns]
+            if missing:
+                raise ValueError(f"Missing feature columns: {missing}")
+            data = data[self.feature_columns]
+        matrix = np.asarray(data, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[1] != len(self.feature_columns):
+            raise ValueError(f"Expected {len(self.feature_columns)} features per row, got shape {matrix.shape}")
+        return matrix
+
+    def transform(self, data):
+        """Scales data the way the training scaler did."""
+        return (self._feature_matrix(data) - self.mean) / self.scale
+
+    def predict(self, data):
+        """
+        Assigns each row of data to its nearest centroid.
+
+        Args:
+            data: DataFrame containing the feature columns (other columns are
+                ignored), or an array with the features in feature_columns order.
+
+        Returns:
+            An int array of cluster labels.
+        """
+        scaled = self.transform(data)
+        # argmin ||x - c||^2 = argmin (||c||^2 - 2 x.c); ||x||^2 is the same for every centroid
+        distances = self.centroid_sq_norms - 2 * (scaled @ self.centroids.T)
+        return distances.argmin(axis=1)
+
+    def predict_one(self, scores):
+        """
+        Returns the cluster of a single student.
+
+        Args:
+            scores: Mapping (dict or Series) of feature column to score, or a
+                sequence in feature_columns order.
+        """
+        if isinstance(scores, pd.Series):
+            scores = scores.to_dict() # Much cheaper than label-indexing the Series per column
+        if hasattr(scores, 'keys'):
+            scores = [scores[col] for col in self.feature_columns]
+        scaled = (np.asarray(scores, dtype=np.float64) - self.mean) / self.scale
+        if scaled.shape != self.mean.shape:
+            raise ValueError(f"Expected {len(self.feature_columns)} features, got {scaled.size}")
+        return int((self.centroid_sq_norms - 2 * (self.centroids @ scaled)).argmin())
+
+    def predict_csv(self, data_path, output_path=None, chunksize=100_000):
+        """
+        Assigns clusters to every student in a CSV, reading it in chunks.
+
+        Returns:
+            A DataFrame of 'Student' and 'Cluster', or None if output_path is
+            given, in which case the assignments are written there instead.
+        """
+        results = []
+        for i, chunk in enumerate(pd.read_csv(data_path, chunksize=chunksize)):
+            assignments = chunk[['Student']].copy()
+            assignments['Cluster'] = self.predict(chunk)
+            if output_path is None:
+                results.append(assignments)
+            else:
+                assignments.to_csv(output_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        if output_path is None:
+            return pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=['Student', 'Cluster'])
+        return None
+
+
+def save_model(model_dir, scaler, kmeans_model, feature_columns):
+    """Saves a fitted scaler and k-means model as a ClusterModel bundle in model_dir."""
+    model = ClusterModel.from_fitted(scaler, kmeans_model, feature_columns)
+    model.save(model_dir)
+    return model
+
+
+def load_model(model_dir):
+    """Loads a ClusterModel bundle saved with save_model."""
+    return ClusterModel.load(model_dir)
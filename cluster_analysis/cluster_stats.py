@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# Feedback thresholds, in scaled (z-score) units
+IMPROVE_BELOW_MEAN = 0
+HIGH_VARIABILITY_STD = 0.8
+STRONG_FROM_MEAN = 0.5
+
+STAT_COLUMNS = ['Mean', 'Std', 'Min', 'Max', 'Range']
+
+
+def cluster_statistics(df, cluster_column='Cluster', exclude=('Student',)):
+    """
+    Computes per-cluster, per-topic statistics from one groupby.
+
+    The grouping of the labels is computed once and shared by five
+    vectorized reductions (mean, std, min, max, size), so cluster data is
+    never filtered out or copied per cluster. (A single
+    grouped.agg(['mean', 'std', ...]) call is slower: it runs column by
+    column.)
+
+    Args:
+        df: DataFrame with one numerical column per topic and a cluster column.
+        cluster_column: Name of the cluster label column.
+        exclude: Other non-topic columns to ignore.
+
+    Returns:
+        A tidy DataFrame with one row per (Cluster, Topic) and the columns
+        Cluster, Topic, Count, Mean, Std, Min, Max and Range. Std is the
+        sample standard deviation (NaN for single-student clusters).
+    """
+    topics = [col for col in df.columns if col != cluster_column and col not in exclude]
+    grouped = df[topics].groupby(df[cluster_column].to_numpy(), sort=True)
+    means = grouped.mean()
+    clusters = means.index.to_numpy()
+    mins, maxs = grouped.min().to_numpy(), grouped.max().to_numpy()
+    counts = grouped.size().to_numpy()
+
+    return tidy_cluster_table(clusters, topics, counts, means.to_numpy(), grouped.std().to_numpy(), mins, maxs)
+
+
+def tidy_cluster_table(clusters, topics, counts, means, stds, mins, maxs):
+    """
+    Lays out (clusters x topics) statistic matrices as one row per (Cluster, Topic),
+    in the cluster_statistics format, for statistics computed some other way
+    (e.g. from running sums in incremental_clustering).
+    """
+    num_topics = len(topics)
+    return pd.DataFrame({
+        'Cluster': np.repeat(clusters, num_topics),
+        'Topic': np.tile(np.asarray(topics, dtype=object), len(clusters)),
+        'Count': np.repeat(counts, num_topics),
+        'Mean': means.ravel(),
+        'Std': stds.ravel(),
+        'Min': mins.ravel(),
+        'Max': maxs.ravel(),
+        'Range': (maxs - mins).ravel(),
+    })
+
+
+def cluster_feedback(stats):
+    """
+    Derives feedback records from a cluster_statistics table.
+
+    Each record is a dict with 'cluster', 'topic' and 'kind', where kind is one of:
+        'improve': mean below IMPROVE_BELOW_MEAN
+        'high_variability': as 'improve', and std above HIGH_VARIABILITY_STD
+        'strong': mean at or above STRONG_FROM_MEAN
+        'highest_std' / 'lowest_std': the cluster's most and least variable topic
+    Records are in cluster order, then in the order analyze_clusters prints them.
+    """
+    records = []
+    for cluster_num, cluster_stats in stats.groupby('Cluster', sort=True):
+        for topic, mean, std in zip(cluster_stats['Topic'], cluster_stats['Mean'], cluster_stats['Std']):
+            if mean < IMPROVE_BELOW_MEAN:
+                records.append({'cluster': cluster_num, 'topic': topic, 'kind': 'improve'})
+                if std > HIGH_VARIABILITY_STD:
+                    records.append({'cluster': cluster_num, 'topic': topic, 'kind': 'high_variability'})
+            if mean >= STRONG_FROM_MEAN:
+                records.append({'cluster': cluster_num, 'topic': topic, 'kind': 'strong'})
+
+        stds = cluster_stats['Std'].to_numpy()
+        if not np.isnan(stds).all():
+            topics = cluster_stats['Topic'].to_numpy()
+            records.append({'cluster': cluster_num, 'topic': topics[np.nanargmax(stds)], 'kind': 'highest_std'})
+            records.append({'cluster': cluster_num, 'topic': topics[np.nanargmin(stds)], 'kind': 'lowest_std'})
+    return records
+
+
+FEEDBACK_MESSAGES = {
+    'improve': "  Students in this cluster could improve on {topic}.",
+    'high_variability': "    Note: There is high variability in {topic} scores within this cluster.",
+    'strong': "  Students in this cluster are strong on {topic}.",
+    'highest_std': "\n  Highest standard deviation in this cluster: {topic}",
+    'lowest_std': "  Lowest standard deviation in this cluster: {topic}",
+}
+
+
+def render_cluster_report(stats, feedback):
+    """
+    Renders a cluster_statistics table and cluster_feedback records as the
+    text report analyze_clusters prints.
+    """
+    feedback_by_cluster = {}
+    for record in feedback:
+        feedback_by_cluster.setdefault(record['cluster'], []).append(record)
+
+    lines = []
+    for cluster_num, cluster_stats in stats.groupby('Cluster', sort=True):
+        lines.append(f"\n--- Cluster {cluster_num} Analysis ---")
+        for topic, mean, std, value_range in zip(cluster_stats['Topic'], cluster_stats['Mean'],
+                                                 cluster_stats['Std'], cluster_stats['Range']):
+            lines.append(f"\n  {topic}:")
+            lines.append(f"    Mean: {mean:.2f}")
+            lines.append(f"    Standard Deviation: {std:.2f}")
+            lines.append(f"    Range: {value_range:.2f}")
+        for record in feedback_by_cluster.get(cluster_num, ()):
+            lines.append(FEEDBACK_MESSAGES[record['kind']].format(topic=record['topic']))
+    return "\n".join(lines)
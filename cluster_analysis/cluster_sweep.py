@@ -0,0 +1,118 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.metrics import silhouette_score
+from threadpoolctl import threadpool_limits
+
+from cluster_analysis import preprocess_data
+
+# Set in each worker process by _attach_shared_matrix
+_shared_matrix = None
+_shared_block = None
+
+
+def _attach_shared_matrix(name, shape, dtype):
+    """Worker initializer: maps the parent's shared scaled matrix instead of unpickling a copy."""
+    global _shared_matrix, _shared_block
+    _shared_block = shared_memory.SharedMemory(name=name)
+    _shared_matrix = np.ndarray(shape, dtype=dtype, buffer=_shared_block.buf)
+    threadpool_limits(1)  # One BLAS/OpenMP thread per worker; the pool provides the parallelism
+
+
+def _fit_configuration(num_clusters, seed, silhouette_sample_size, matrix=None):
+    """Fits one (k, seed) configuration and returns (metrics dict, fitted model)."""
+    matrix = _shared_matrix if matrix is None else matrix
+    start = time.perf_counter()
+    kmeans = KMeans(n_clusters=num_clusters, n_init=1, random_state=seed).fit(matrix)
+    fit_time = time.perf_counter() - start
+
+    sample_size = silhouette_sample_size if len(matrix) > silhouette_sample_size else None
+    silhouette = silhouette_score(matrix, kmeans.labels_, sample_size=sample_size, random_state=seed)
+    kmeans.labels_ = None  # Avoids shipping n labels back per configuration; restored on the best model
+    metrics = {
+        'num_clusters': num_clusters,
+        'seed': seed,
+        'inertia': kmeans.inertia_,
+        'silhouette': silhouette,
+        'fit_time': fit_time,
+    }
+    return metrics, kmeans
+
+
+def _best_outcome(outcomes, matrix):
+    """Returns (results, best_model) from the fitted configurations, with best_model's labels_ restored."""
+    results = pd.DataFrame([metrics for metrics, _ in outcomes])
+    best = max(range(len(outcomes)), key=lambda i: (results['silhouette'][i], -results['inertia'][i]))
+    best_model = outcomes[best][1]
+    best_model.labels_ = best_model.predict(matrix)
+    return results, best_model
+
+
+def _scaled_matrix(data):
+    """Returns the numerical features of data as a C-contiguous float matrix."""
+    if isinstance(data, (str, os.PathLike)):
+        data, _ = preprocess_data(data)
+    if isinstance(data, pd.DataFrame):
+        data = data.drop(columns=[col for col in ('Student', 'Cluster') if col in data.columns])
+    matrix = np.ascontiguousarray(data)
+    if matrix.dtype not in (np.float32, np.float64):
+        matrix = matrix.astype(np.float64)
+    return matrix
+
+
+def sweep_num_clusters(data, k_values=range(2, 11), seeds=(0, 1, 2), workers=None,
+                       silhouette_sample_size=10_000):
+    """
+    Fits k-means for every combination of k and seed, in parallel, to help choose
+    the number of clusters.
+
+    The data is preprocessed once and placed in shared memory, which every
+    worker maps rather than having a copy pickled to it. Each fit still copies
+    the matrix while it runs: KMeans centres the data, and with copy_x=False it
+    would do so in place on the shared block.
+
+    Args:
+        data: Path to the student CSV, a DataFrame from preprocess_data, or a
+            scaled feature matrix.
+        k_values: Numbers of clusters to try.
+        seeds: Random seeds to try for each k.
+        workers: Number of worker processes. Defaults to os.cpu_count(); with
+            one worker everything runs in the calling process.
+        silhouette_sample_size: Silhouette scores are computed on a random sample
+            of this many rows when there are more students than that.
+
+    Returns:
+        (results, best_model): a DataFrame with num_clusters, seed, inertia,
+        silhouette and fit_time per configuration, and the KMeans model with
+        the highest silhouette score. Only best_model keeps its labels_.
+    """
+    matrix = _scaled_matrix(data)
+    configurations = [(k, seed) for k in k_values for seed in seeds]
+    if not configurations:
+        raise ValueError("Need at least one value of k and one seed.")
+    workers = min(workers or os.cpu_count() or 1, len(configurations))
+
+    if workers == 1:
+        outcomes = [_fit_configuration(k, seed, silhouette_sample_size, matrix) for k, seed in configurations]
+        return _best_outcome(outcomes, matrix)
+
+    block = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+    try:
+        shared = np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=block.buf)
+        shared[:] = matrix
+        matrix = shared  # Frees the matrix _scaled_matrix built, so the parent holds only the shared copy
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared_matrix,
+                                 initargs=(block.name, matrix.shape, matrix.dtype)) as pool:
+            futures = [pool.submit(_fit_configuration, k, seed, silhouette_sample_size)
+                       for k, seed in configurations]
+            outcomes = [future.result() for future in futures]
+        return _best_outcome(outcomes, matrix)
+    finally:
+        shared = matrix = None  # The block cannot be closed while an array still maps it
+        block.close()
+        block.unlink()
@@ -1,105 +1,223 @@
 #Math Generator
+import argparse
+import os
+
 import pandas as pd
 import numpy as np
-import openpyxl
 
-def generate_student_data(num_students=1000):
+# Topics and their base difficulty (influences average score)
+TOPICS = {
+    'Functions': 0.7, 'Graphs and Transformations': 0.65, 'Equations and Inequalities': 0.7,
+    'Sequences and Series': 0.6, 'Vector I': 0.6, 'Vectors II': 0.55, 'Vectors III': 0.5,
+    'Complex Number': 0.45, 'Differentiation': 0.6, 'Maclaurin series': 0.5,
+    'Integration techniques': 0.55, 'Definite integrals': 0.5, 'Differential equations': 0.45,
+    'Probability': 0.7, 'Discrete random variables': 0.6, 'Normal distribution': 0.65,
+    'Sampling': 0.6, 'Hypothesis testing': 0.5, 'Correlation and linear regression': 0.55,
+    'Class Test 1': 0.7, 'Class Test 2': 0.65, 'Promotional Exam': 0.6,
+    'Class Test 3': 0.55, 'Mid-year Exam': 0.5, 'Preliminary Exam': 0.45
+}
+
+# Student profiles and their distribution
+PROFILES = {
+    'Consistent High': 0.1,
+    'Consistent Low': 0.1,
+    'Strong Algebra, Weak Calculus': 0.1,
+    'Strong Calculus, Weak Stats': 0.1,
+    'Strong Vectors, Weak Probability': 0.1,
+    'Early Starter': 0.15,
+    'Late Bloomer': 0.15,
+    'Inconsistent': 0.2
+}
+
+ALGEBRA_TOPICS = ['Functions', 'Graphs and Transformations', 'Equations and Inequalities', 'Sequences and Series', 'Vector I', 'Vectors II']
+CALCULUS_TOPICS = ['Differentiation', 'Maclaurin series', 'Integration techniques', 'Definite integrals', 'Differential equations']
+VECTOR_TOPICS = ['Vector I', 'Vectors II', 'Vectors III']
+PROBABILITY_TOPICS = ['Probability', 'Discrete random variables', 'Normal distribution']
+EARLY_ASSESSMENTS = ['Class Test 1', 'Class Test 2', 'Promotional Exam']
+
+NOISE_STD = 5  # Extra per-score randomness added on top of every profile
+BLOCK_SIZE = 100_000  # Students drawn at once; bounds the temporary float arrays
+
+
+def profile_score_parameters(profile):
     """
-    Generates synthetic student performance data.
+    Returns (means, stds): the mean and standard deviation of the base score
+    for each topic, in TOPICS order, for students of the given profile.
+    """
+    topics = list(TOPICS)
+    difficulty = np.array(list(TOPICS.values()))
+
+    def in_group(group):
+        return np.isin(topics, group)
+
+    def choose(condition, if_true, if_false):
+        return np.where(condition, if_true, if_false).astype(float)
+
+    if profile == 'Consistent High':
+        return np.full(len(topics), 85.0), np.full(len(topics), 5.0)
+    elif profile == 'Consistent Low':
+        return np.full(len(topics), 45.0), np.full(len(topics), 5.0)
+    elif profile == 'Strong Algebra, Weak Calculus':
+        strong = in_group(ALGEBRA_TOPICS)
+        return choose(strong, 80, 50), choose(strong, 7, 10)
+    elif profile == 'Strong Calculus, Weak Stats':
+        strong = in_group(CALCULUS_TOPICS)
+        return choose(strong, 80, 50), choose(strong, 7, 10)
+    elif profile == 'Strong Vectors, Weak Probability':
+        strong, weak = in_group(VECTOR_TOPICS), in_group(PROBABILITY_TOPICS)
+        means = np.select([strong, weak], [85.0, 45.0], 65.0)
+        return means, np.where(strong, 5.0, 10.0)
+    elif profile == 'Early Starter':
+        early = in_group(EARLY_ASSESSMENTS)
+        # difficulty * 100 - difficulty * 20: decrease over time
+        return choose(early, 80, difficulty * 80), choose(early, 7, 10)
+    elif profile == 'Late Bloomer':
+        early = in_group(EARLY_ASSESSMENTS)
+        # difficulty * 100 + difficulty * 20: increase over time
+        return choose(early, 50, difficulty * 120), np.full(len(topics), 10.0)
+    elif profile == 'Inconsistent':
+        return np.full(len(topics), 60.0), np.full(len(topics), 15.0)  # Wider standard deviation
+    else:
+        return difficulty * 100, np.full(len(topics), 10.0)  # Base score based on topic difficulty
+
+
+def draw_profile_scores(rng, means, stds, num_students):
+    """
+    Draws a (num_students, num_topics) block of uint8 scores in 0-100.
+
+    Each score is a base score from N(mean, std) plus N(0, NOISE_STD) noise,
+    truncated to an integer and clipped, as the original per-student loop did.
+    Both normals for a student are drawn together, so splitting the same
+    students into smaller blocks consumes the generator identically.
     """
+    normals = rng.standard_normal((num_students, 2, len(means)))
+    scores = means + stds * normals[:, 0] + NOISE_STD * normals[:, 1]
+    return np.clip(np.trunc(scores), 0, 100).astype(np.uint8)
 
-    # Topics and their base difficulty (influences average score)
-    topics = {
-        'Functions': 0.7, 'Graphs and Transformations': 0.65, 'Equations and Inequalities': 0.7,
-        'Sequences and Series': 0.6, 'Vector I': 0.6, 'Vectors II': 0.55, 'Vectors III': 0.5,
-        'Complex Number': 0.45, 'Differentiation': 0.6, 'Maclaurin series': 0.5,
-        'Integration techniques': 0.55, 'Definite integrals': 0.5, 'Differential equations': 0.45,
-        'Probability': 0.7, 'Discrete random variables': 0.6, 'Normal distribution': 0.65,
-        'Sampling': 0.6, 'Hypothesis testing': 0.5, 'Correlation and linear regression': 0.55,
-        'Class Test 1': 0.7, 'Class Test 2': 0.65, 'Promotional Exam': 0.6,
-        'Class Test 3': 0.55, 'Mid-year Exam': 0.5, 'Preliminary Exam': 0.45
-    }
-
-    # Student profiles and their distribution
-    profiles = {
-        'Consistent High': 0.1,
-        'Consistent Low': 0.1,
-        'Strong Algebra, Weak Calculus': 0.1,
-        'Strong Calculus, Weak Stats': 0.1,
-        'Strong Vectors, Weak Probability': 0.1,
-        'Early Starter': 0.15,
-        'Late Bloomer': 0.15,
-        'Inconsistent': 0.2
-    }
-
-    data = []
-    student_id = 1
-
-    for profile, proportion in profiles.items():
-        num_students_in_profile = int(num_students * proportion)
-
-        for _ in range(num_students_in_profile):
-            student_data = {'Student': f'Student {student_id}'}
-            student_id += 1
-
-            # Adjust topic scores based on profile
-            for topic, difficulty in topics.items():
-                if profile == 'Consistent High':
-                    base_score = np.random.normal(85, 5)
-                elif profile == 'Consistent Low':
-                    base_score = np.random.normal(45, 5)
-                elif profile == 'Strong Algebra, Weak Calculus':
-                    if topic in ['Functions', 'Graphs and Transformations', 'Equations and Inequalities', 'Sequences and Series', 'Vector I', 'Vectors II']:
-                        base_score = np.random.normal(80, 7)
-                    else:
-                        base_score = np.random.normal(50, 10)
-                elif profile == 'Strong Calculus, Weak Stats':
-                    if topic in ['Differentiation', 'Maclaurin series', 'Integration techniques', 'Definite integrals', 'Differential equations']:
-                        base_score = np.random.normal(80, 7)
-                    else:
-                        base_score = np.random.normal(50, 10)
-
-                elif profile == 'Strong Vectors, Weak Probability':
-                    if topic in ['Vector I', 'Vectors II', 'Vectors III']:
-                        base_score = np.random.normal(85, 5)
-                    elif topic in ['Probability', 'Discrete random variables', 'Normal distribution']:
-                        base_score = np.random.normal(45, 10)
-                    else:
-                        base_score = np.random.normal(65, 10)
-
-                elif profile == 'Early Starter':
-                    if topic in ['Class Test 1', 'Class Test 2', 'Promotional Exam']:
-                        base_score = np.random.normal(80, 7)
-                    else:
-                        base_score = np.random.normal(difficulty * 100, 10) - (topics[topic] * 20 ) # Decrease over time
-
-                elif profile == 'Late Bloomer':
-                    if topic in ['Class Test 1', 'Class Test 2', 'Promotional Exam']:
-                        base_score = np.random.normal(50, 10)
-                    else:
-                        base_score = np.random.normal(difficulty * 100, 10) + (topics[topic] * 20 ) # Increase over time
-
-                elif profile == 'Inconsistent':
-                    base_score = np.random.normal(60, 15)  # Wider standard deviation
-
-                else:
-                    base_score = np.random.normal(difficulty * 100, 10) # Base score based on topic difficulty
-
-                # Add some randomness and ensure scores are within 0-100
-                score = int(base_score + np.random.normal(0, 5))
-                score = max(0, min(score, 100))
-                student_data[topic] = score
-
-            data.append(student_data)
-
-    df = pd.DataFrame(data)
+
+def _student_frame(scores, first_student_id):
+    """Builds the output DataFrame for a block of scores, numbering students from first_student_id."""
+    df = pd.DataFrame(scores, columns=list(TOPICS))
+    df.insert(0, 'Student', [f'Student {student_id}' for student_id in range(first_student_id, first_student_id + len(df))])
     return df
 
-# Generate data
-df = generate_student_data()
 
-# Save to CSV
-df.to_csv('student_data.csv', index=False)
+def iter_student_data(num_students=1000, chunk_size=BLOCK_SIZE, seed=None):
+    """
+    Generates synthetic student performance data in chunks.
 
-# Save to Excel
-df.to_excel('student_data.xlsx', index=False)
+    Yields DataFrames of at most chunk_size students which, concatenated, equal
+    generate_student_data(num_students, seed) for the same seed, whatever the
+    chunk size. Only one chunk is held in memory at a time.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    rng = np.random.default_rng(seed)
+    counts = [int(num_students * proportion) for proportion in PROFILES.values()]
+    remaining = sum(counts)
+    next_student_id = 1
+    scores = None
+    filled = 0
+
+    for profile, count in zip(PROFILES, counts):
+        means, stds = profile_score_parameters(profile)
+        while count:
+            if scores is None:
+                scores = np.empty((min(chunk_size, remaining), len(TOPICS)), dtype=np.uint8)
+            block = min(count, len(scores) - filled, BLOCK_SIZE)
+            scores[filled:filled + block] = draw_profile_scores(rng, means, stds, block)
+            filled += block
+            count -= block
+            if filled == len(scores):
+                yield _student_frame(scores, next_student_id)
+                next_student_id += filled
+                remaining -= filled
+                scores = None
+                filled = 0
+
+
+def generate_student_data(num_students=1000, seed=None):
+    """
+    Generates synthetic student performance data.
+
+    Args:
+        num_students: Total number of students; each profile gets its share, rounded down.
+        seed: Seed (or np.random.Generator) for reproducible data. None draws fresh entropy.
+
+    Returns:
+        A DataFrame with a 'Student' column and one uint8 score column per topic.
+    """
+    total = sum(int(num_students * proportion) for proportion in PROFILES.values())
+    for df in iter_student_data(num_students, chunk_size=max(total, 1), seed=seed):
+        return df
+    return _student_frame(np.empty((0, len(TOPICS)), dtype=np.uint8), 1)
+
+
+EXCEL_MAX_ROWS = 1_048_576  # Including the header row
+
+
+def write_student_data(output_path, num_students=1000, chunk_size=BLOCK_SIZE, seed=None, excel_path=None):
+    """
+    Generates student data chunk by chunk and appends each chunk to output_path,
+    so memory use stays bounded however many students are generated.
+
+    Args:
+        output_path: Destination file; '.csv' or '.parquet' (needs pyarrow).
+        num_students: Total number of students.
+        chunk_size: Students generated and written at a time.
+        seed: Seed for reproducible data.
+        excel_path: Optionally also write an .xlsx copy. Slow, and limited to
+            EXCEL_MAX_ROWS - 1 students.
+
+    Returns:
+        The number of students written.
+    """
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension not in ('.csv', '.parquet'):
+        raise ValueError(f"Unsupported output format '{extension}'. Use .csv or .parquet.")
+    total = sum(int(num_students * proportion) for proportion in PROFILES.values())
+    if excel_path is not None and total + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(f"Excel sheets hold at most {EXCEL_MAX_ROWS - 1} students, got {total}.")
+
+    parquet_writer = None
+    excel_writer = pd.ExcelWriter(excel_path, engine='openpyxl') if excel_path is not None else None
+    written = 0
+    try:
+        for df in iter_student_data(num_students, chunk_size, seed):
+            if extension == '.csv':
+                df.to_csv(output_path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+            else:
+                import pyarrow as pa  # Optional dependency, only needed for Parquet
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(output_path, table.schema)
+                parquet_writer.write_table(table)
+            if excel_writer is not None:
+                df.to_excel(excel_writer, index=False, header=written == 0,
+                            startrow=0 if written == 0 else written + 1)
+            written += len(df)
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+        if excel_writer is not None:
+            excel_writer.close()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic student performance data.")
+    parser.add_argument('--students', type=int, default=1000, help="number of students (default 1000)")
+    parser.add_argument('--output', default='student_data.csv', help="output .csv or .parquet file (default student_data.csv)")
+    parser.add_argument('--chunk-size', type=int, default=BLOCK_SIZE, help=f"students generated per chunk (default {BLOCK_SIZE})")
+    parser.add_argument('--seed', type=int, help="random seed for reproducible data")
+    parser.add_argument('--excel', nargs='?', const='student_data.xlsx', metavar='PATH',
+                        help="also write an Excel copy (default path student_data.xlsx)")
+    args = parser.parse_args(argv)
+
+    written = write_student_data(args.output, args.students, args.chunk_size, args.seed, args.excel)
+    print(f"Wrote {written} students to {args.output}" + (f" and {args.excel}" if args.excel else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+from array_store import load_arrays, read_metadata, save_arrays
+from cluster_model import ClusterModel
+from cluster_stats import cluster_feedback, render_cluster_report, tidy_cluster_table
+from student_io import STUDENT_COLUMN, load_student_data
+
+STATE_FORMAT_VERSION = 1  # Of the state save() writes
+# Saved with the state, so that load() needs no distance computations (see IncrementalClusterer.__init__)
+_BOUNDS_ARRAYS = ['upper_bounds', 'lower_bounds', 'reference_mean', 'reference_scale', 'reference_centroids']
+
+DEFAULT_MAX_ITER = 100
+_CHUNK_ROWS = 100_000  # Students scaled and compared with the centroids at a time
+
+
+class IncrementalClusterer:
+    """
+    K-means clustering of a student cohort that is updated in place as new
+    scores arrive, instead of being refitted from scratch.
+
+    Per-cluster counts, sums and sums of squares of the raw scores are kept
+    up to date as students are added, changed or move between clusters. The
+    scaler (mean and standard deviation per topic) and the centroids (cluster
+    means) are derived from those sums, and so are the per-cluster statistics,
+    so none of them needs a pass over the whole cohort.
+
+    An update adds the new students and columns, then runs warm-started Lloyd
+    iterations until no student changes cluster. Each student carries an
+    upper bound on the distance to its own centroid and a lower bound on the
+    distance to any other one, loosened by how far the scaler and centroids
+    have moved (Hamerly's algorithm), so only students whose bounds overlap are
+    compared with the centroids again.
+
+    Usage:
+        clusterer = IncrementalClusterer.from_csv('student_data.csv')
+        clusterer.save('cluster_state')
+        ...
+        clusterer = IncrementalClusterer.load('cluster_state')
+        report = clusterer.update_csv('class_test_4.csv')   # report['changed_cluster']
+        stats, feedback = clusterer.analyze()
+        clusterer.save('cluster_state')
+    """
+
+    def __init__(self, students, feature_columns, scores, labels, num_clusters, bounds=None):
+        """
+        Construction makes one pass over the scores for the running sums and,
+        unless bounds are given, computes every student's distance to every
+        centroid for the bounds (O(students x clusters)); load() passes the
+        bounds save() wrote, so it skips that.
+
+        Args:
+            students: Student names, one per row of scores.
+            feature_columns: Topic names, one per column of scores.
+            scores: (students x topics) raw scores.
+            labels: Each student's cluster, from 0 to num_clusters - 1.
+            num_clusters: Number of clusters.
+            bounds: (upper, lower, mean, scale, raw_centroids): the bounds as saved
+                by save() and the scaler and centroids they are relative to.
+        """
+        self._students = pd.Index(np.asarray(students, dtype=str))
+        if self._students.has_duplicates:
+            raise ValueError("Student names must be unique.")
+        self.feature_columns = list(feature_columns)
+        self._column_positions = {col: i for i, col in enumerate(self.feature_columns)}
+        self._scores = np.array(scores, dtype=np.float32, order='C')
+        self._labels = np.array(labels, dtype=np.intp)
+        self.num_clusters = num_clusters
+        if self._scores.shape != (len(self._students), len(self.feature_columns)) or \
+                self._labels.shape != (len(self._students),):
+            raise ValueError("Students, feature columns, scores and labels have inconsistent sizes.")
+        if len(self._labels) and not 0 <= self._labels.min() <= self._labels.max() < num_clusters:
+            raise ValueError(f"Labels must be between 0 and {num_clusters - 1}.")
+
+        # The one full pass: per-cluster sums, and exact bounds for every student unless given
+        self._counts = np.zeros(num_clusters, dtype=np.int64)
+        self._sums = np.zeros((num_clusters, len(self.feature_columns)))
+        self._sumsq = np.zeros_like(self._sums)
+        self._mins = np.full_like(self._sums, np.inf)
+        self._maxs = np.full_like(self._sums, -np.inf)
+        self._stale_extremes = np.zeros(num_clusters, dtype=bool)
+        self._raw_centroids = np.zeros_like(self._sums)
+        self._add_rows(np.arange(len(self._labels)), self._labels)
+
+        if bounds is not None:
+            upper, lower, *reference = bounds
+            self._upper, self._lower = np.array(upper, dtype=np.float64), np.array(lower, dtype=np.float64)
+            self._reference = tuple(np.array(array, dtype=np.float64) for array in reference)
+            if self._upper.shape != self._labels.shape or self._lower.shape != self._labels.shape or \
+                    self._reference[2].shape != self._sums.shape:
+                raise ValueError("Bounds do not match the students and clusters.")
+            self._raw_centroids[:] = self._reference[2]  # Empty clusters keep their last centroid
+            return
+        mean, scale = self._scaler()
+        raw_centroids = self._current_raw_centroids()
+        self._upper, self._lower = self._bounds(np.arange(len(self._labels)), self._labels, mean, scale,
+                                                (raw_centroids - mean) / scale)
+        self._reference = (mean, scale, raw_centroids)  # What the bounds are relative to
+
+    @classmethod
+    def fit(cls, data, num_clusters=5, random_state=42):
+        """
+        Clusters a cohort from scratch, as preprocess_data and cluster_students do.
+
+        Args:
+            data: DataFrame with the 'Student' column and one score column per topic.
+            num_clusters: The desired number of student clusters.
+            random_state: Seed for k-means.
+        """
+        feature_columns = [col for col in data.columns if col != STUDENT_COLUMN]
+        scores = data[feature_columns].to_numpy(dtype=np.float32)
+        if len(scores) < num_clusters:
+            raise ValueError(f"Need at least {num_clusters} students to form {num_clusters} clusters.")
+        scaled = StandardScaler().fit_transform(scores)
+        labels = KMeans(n_clusters=num_clusters, random_state=random_state).fit_predict(scaled)
+        return cls(data[STUDENT_COLUMN].astype(str).to_numpy(), feature_columns, scores, labels, num_clusters)
+
+    @classmethod
+    def from_csv(cls, data_path, num_clusters=5, cache_dir=None, random_state=42):
+        """Clusters the cohort in a student scores CSV from scratch (see fit)."""
+        return cls.fit(load_student_data(data_path, cache_dir), num_clusters, random_state)
+
+    def __len__(self):
+        return len(self._labels)
+
+    # --- Running sums ---
+
+    def _add_rows(self, rows, labels, sign=1):
+        """Adds (sign=1) or removes (sign=-1) the scores of rows to/from the sums of clusters labels."""
+        if not len(rows):
+            return
+        values = self._scores[rows].astype(np.float64)
+        # Grouped sums as one matrix product with a (clusters x rows) indicator; much faster than np.add.at
+        indicator = np.zeros((self.num_clusters, len(rows)))
+        indicator[labels, np.arange(len(rows))] = sign
+        self._counts += sign * np.bincount(labels, minlength=self.num_clusters)
+        self._sums += indicator @ values
+        self._sumsq += indicator @ values ** 2
+        if sign > 0:
+            for cluster_num in np.flatnonzero(indicator.any(axis=1)):
+                members = values[labels == cluster_num]
+                np.minimum(self._mins[cluster_num], members.min(axis=0), out=self._mins[cluster_num])
+                np.maximum(self._maxs[cluster_num], members.max(axis=0), out=self._maxs[cluster_num])
+        else:
+            # Extremes can't be taken back out of a running min/max; recompute those lazily
+            at_extreme = ((values == self._mins[labels]) | (values == self._maxs[labels])).any(axis=1)
+            self._stale_extremes[labels[at_extreme]] = True
+
+    def _refresh_extremes(self):
+        for cluster_num in np.flatnonzero(self._stale_extremes):
+            members = self._scores[self._labels == cluster_num]
+            if len(members):
+                self._mins[cluster_num], self._maxs[cluster_num] = members.min(axis=0), members.max(axis=0)
+            else:
+                self._mins[cluster_num], self._maxs[cluster_num] = np.inf, -np.inf
+        self._stale_extremes[:] = False
+
+    def _scaler(self):
+        """Returns the StandardScaler mean and scale of the whole cohort, from the per-cluster sums."""
+        total = self._counts.sum()
+        mean = self._sums.sum(axis=0) / total
+        variance = np.maximum(self._sumsq.sum(axis=0) / total - mean ** 2, 0)
+        scale = np.sqrt(variance)
+        # Constant columns are left unscaled, as StandardScaler does (allowing for rounding in the sums)
+        scale[variance <= 1e-12 * np.maximum(mean ** 2, 1)] = 1.0
+        return mean, scale
+
+    def _current_raw_centroids(self):
+        """Cluster means in raw score units; an empty cluster keeps its last centroid."""
+        present = self._counts > 0
+        self._raw_centroids[present] = self._sums[present] / self._counts[present, np.newaxis]
+        return self._raw_centroids.copy()
+
+    # --- Assignment ---
+
+    def _distances(self, rows, mean, scale, centroids):
+        """(rows x clusters) distances in scaled units, in chunks of _CHUNK_ROWS students."""
+        distances = np.empty((len(rows), self.num_clusters))
+        for start in range(0, len(rows), _CHUNK_ROWS):
+            scaled = (self._scores[rows[start:start + _CHUNK_ROWS]] - mean) / scale
+            for cluster_num, centroid in enumerate(centroids):
+                difference = scaled - centroid
+                distances[start:start + len(scaled), cluster_num] = np.sqrt(
+                    np.einsum('ij,ij->i', difference, difference))
+        return distances
+
+    def _bounds(self, rows, labels, mean, scale, centroids):
+        """Exact distance of each row to its labelled centroid, and to the nearest other one."""
+        distances = self._distances(rows, mean, scale, centroids)
+        index = np.arange(len(rows))
+        upper = distances[index, labels]
+        distances[index, labels] = np.inf
+        return upper, distances.min(axis=1)
+
+    def _refresh_bounds(self):
+        """
+        Loosens the bounds to the current scaler and centroids, which become the new reference.
+
+        Distances between raw scores x and c scaled by scale_old change by at
+        most a factor of max(scale_old / scale_new) (and at least min(...)) when
+        rescaled by scale_new; the mean cancels out. Each centroid then moves by
+        its drift, measured in the new scaled units.
+        """
+        mean, scale = self._scaler()
+        raw_centroids = self._current_raw_centroids()
+        if self._reference is not None:
+            reference_mean, reference_scale, reference_centroids = self._reference
+            ratios = reference_scale / scale
+            drift = np.sqrt((((raw_centroids - reference_centroids) / scale) ** 2).sum(axis=1))
+            self._upper = self._upper * ratios.max() + drift[self._labels]
+            self._lower = self._lower * ratios.min() - drift.max()
+        self._reference = (mean, scale, raw_centroids)
+        return mean, scale, (raw_centroids - mean) / scale
+
+    def _refine(self, max_iter):
+        """
+        Runs Lloyd iterations, only comparing students whose bounds overlap
+        with the centroids, until no student changes cluster.
+
+        Returns:
+            (iterations, converged, students checked over all iterations)
+        """
+        checked = 0
+        for iteration in range(1, max_iter + 1):
+            mean, scale, centroids = self._refresh_bounds()
+            candidates = np.flatnonzero(self._upper > self._lower)
+            checked += len(candidates)
+            distances = self._distances(candidates, mean, scale, centroids)
+            nearest = distances.argmin(axis=1)
+            index = np.arange(len(candidates))
+            self._upper[candidates] = distances[index, nearest]
+            distances[index, nearest] = np.inf
+            self._lower[candidates] = distances.min(axis=1)
+
+            moved = nearest != self._labels[candidates]
+            if not moved.any():
+                return iteration, True, checked
+            rows, new_labels = candidates[moved], nearest[moved]
+            self._add_rows(rows, self._labels[rows], -1)
+            self._labels[rows] = new_labels
+            self._add_rows(rows, new_labels)
+        return max_iter, False, checked
+
+    def _invalidate(self, rows):
+        """Forces rows to be compared with every centroid at the next iteration."""
+        self._upper[rows] = np.inf
+        self._lower[rows] = -np.inf
+
+    # --- Updates ---
+
+    def _add_columns(self, columns, fill):
+        """Appends topic columns, filling them with fill (one value per column) for every student."""
+        fill = np.asarray(fill, dtype=np.float32)
+        filled = np.broadcast_to(fill, (len(self), len(columns)))
+        self._scores = np.hstack([self._scores, filled])
+        self.feature_columns += columns
+        self._column_positions = {col: i for i, col in enumerate(self.feature_columns)}
+
+        fill = fill.astype(np.float64)  # Exactly the stored values, so the sums stay consistent
+        present = self._counts[:, np.newaxis] > 0
+        self._sums = np.hstack([self._sums, self._counts[:, np.newaxis] * fill])
+        self._sumsq = np.hstack([self._sumsq, self._counts[:, np.newaxis] * fill ** 2])
+        self._mins = np.hstack([self._mins, np.where(present, fill, np.inf)])
+        self._maxs = np.hstack([self._maxs, np.where(present, fill, -np.inf)])
+        self._raw_centroids = np.hstack([self._raw_centroids, np.broadcast_to(fill, (self.num_clusters, len(fill)))])
+        # Distances gain a dimension the bounds know nothing about, so every student is checked again
+        self._invalidate(slice(None))
+        self._reference = None
+
+    def _change_rows(self, rows, positions, values):
+        """Overwrites the given columns of existing students; returns the rows whose scores changed."""
+        values = values.astype(np.float32)
+        changed = (self._scores[np.ix_(rows, positions)] != values).any(axis=1)
+        rows, values = rows[changed], values[changed]
+        self._add_rows(rows, self._labels[rows], -1)
+        self._scores[np.ix_(rows, positions)] = values
+        self._add_rows(rows, self._labels[rows])
+        self._invalidate(rows)
+        return rows
+
+    def _add_students(self, names, positions, values):
+        """Appends new students; topics they have no score for are filled with the cohort mean."""
+        mean, scale = self._scaler()
+        scores = np.empty((len(names), len(self.feature_columns)), dtype=np.float32)
+        scores[:] = mean
+        scores[:, positions] = values
+        first_row = len(self)
+        self._scores = np.vstack([self._scores, scores])
+        self._students = self._students.append(pd.Index(names))
+
+        # Provisionally assign them to the nearest current centroid; _refine settles the rest
+        rows = np.arange(first_row, len(self._scores))
+        centroids = (self._current_raw_centroids() - mean) / scale
+        labels = self._distances(rows, mean, scale, centroids).argmin(axis=1)
+        self._labels = np.concatenate([self._labels, labels])
+        self._upper = np.concatenate([self._upper, np.empty(len(rows))])
+        self._lower = np.concatenate([self._lower, np.empty(len(rows))])
+        self._invalidate(rows)
+        self._add_rows(rows, labels)
+
+    def update(self, new_data, max_iter=DEFAULT_MAX_ITER):
+        """
+        Applies new scores and re-clusters the students they affect.
+
+        Rows for students already in the cohort overwrite the scores they
+        give; other rows are new students, whose missing topics are filled
+        with the cohort mean. Columns not seen before (e.g. a new class test)
+        are added for everyone, filled with the mean of the given scores for
+        students not in new_data.
+
+        Args:
+            new_data: DataFrame with the 'Student' column and any score columns.
+            max_iter: Maximum number of Lloyd iterations.
+
+        Returns:
+            A dict with:
+                new_students, changed_students, new_columns: what the update added or changed
+                changed_cluster: existing students now in a different cluster
+                checked: students compared with the centroids, summed over iterations
+                iterations, converged: whether the clustering settled within max_iter
+        """
+        if STUDENT_COLUMN not in new_data.columns:
+            raise ValueError(f"new_data has no {STUDENT_COLUMN!r} column.")
+        names = new_data[STUDENT_COLUMN].astype(str).to_numpy()
+        if pd.Index(names).has_duplicates:
+            raise ValueError("new_data lists a student more than once.")
+        columns = [col for col in new_data.columns if col != STUDENT_COLUMN]
+        values = new_data[columns].to_numpy(dtype=np.float64)
+        if np.isnan(values).any():
+            raise ValueError("new_data has missing scores.")
+
+        previous_labels = self._labels.copy()
+        new_columns = [col for col in columns if col not in self._column_positions]
+        if new_columns:
+            if not len(new_data):
+                raise ValueError(f"No scores given for the new columns {new_columns}.")
+            self._add_columns(new_columns, values[:, [columns.index(col) for col in new_columns]].mean(axis=0))
+        positions = [self._column_positions[col] for col in columns]
+
+        rows = self._students.get_indexer(names)
+        known = rows >= 0
+        changed_rows = self._change_rows(rows[known], positions, values[known])
+        self._add_students(names[~known], positions, values[~known])
+        iterations, converged, checked = self._refine(max_iter)
+
+        return {
+            'new_students': int((~known).sum()),
+            'changed_students': len(changed_rows),
+            'new_columns': new_columns,
+            'changed_cluster': int((self._labels[:len(previous_labels)] != previous_labels).sum()),
+            'checked': checked,
+            'iterations': iterations,
+            'converged': converged,
+        }
+
+    def update_csv(self, data_path, cache_dir=None, max_iter=DEFAULT_MAX_ITER):
+        """Applies the scores in a student scores CSV (see update)."""
+        return self.update(load_student_data(data_path, cache_dir), max_iter)
+
+    # --- Results ---
+
+    @property
+    def labels(self):
+        """Each student's cluster, in cohort order (a read-only view)."""
+        view = self._labels.view()
+        view.flags.writeable = False
+        return view
+
+    def assignments(self):
+        """Returns a DataFrame of 'Student' and 'Cluster'."""
+        return pd.DataFrame({STUDENT_COLUMN: self._students.to_numpy(), 'Cluster': self._labels})
+
+    def statistics(self):
+        """
+        Returns the per-cluster, per-topic statistics table of
+        cluster_stats.cluster_statistics, in scaled units, computed from the
+        running sums rather than from the students' scores.
+        """
+        self._refresh_extremes()
+        mean, scale = self._scaler()
+        clusters = np.flatnonzero(self._counts > 0)
+        counts = self._counts[clusters]
+        sums, sumsq = self._sums[clusters], self._sumsq[clusters]
+        raw_means = sums / counts[:, np.newaxis]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Sample variance, NaN for single-student clusters as in cluster_statistics
+            variance = (sumsq - sums * raw_means) / (counts[:, np.newaxis] - 1)
+        stds = np.sqrt(np.maximum(variance, 0)) / scale
+        return tidy_cluster_table(clusters, self.feature_columns, counts, (raw_means - mean) / scale, stds,
+                           (self._mins[clusters] - mean) / scale, (self._maxs[clusters] - mean) / scale)
+
+    def analyze(self):
+        """Prints the cluster report, as analyze_clusters does, and returns (stats, feedback)."""
+        stats = self.statistics()
+        feedback = cluster_feedback(stats)
+        print(render_cluster_report(stats, feedback))
+        return stats, feedback
+
+    def to_model(self):
+        """Returns the current scaler and centroids as a ClusterModel, e.g. to save for prediction."""
+        mean, scale = self._scaler()
+        metadata = {
+            'feature_columns': list(self.feature_columns),
+            'num_clusters': self.num_clusters,
+            'model_type': type(self).__name__,
+            'fitted_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        }
+        return ClusterModel(self.feature_columns, mean, scale, (self._current_raw_centroids() - mean) / scale,
+                            metadata)
+
+    # --- Persistence ---
+
+    def save(self, state_dir):
+        """
+        Writes the cohort (student names, scores and clusters) and the distance
+        bounds to state_dir. load() rebuilds the running sums from the scores.
+        """
+        arrays = {'students': self._students.to_numpy(dtype=str), 'scores': self._scores, 'labels': self._labels}
+        if self._reference is not None:
+            arrays.update(zip(_BOUNDS_ARRAYS, (self._upper, self._lower, *self._reference)))
+        save_arrays(state_dir, arrays, {
+            'feature_columns': self.feature_columns,
+            'num_clusters': self.num_clusters,
+            'bounds': self._reference is not None,
+            'saved_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        }, STATE_FORMAT_VERSION)
+
+    @classmethod
+    def load(cls, state_dir):
+        """Loads a cohort written by save()."""
+        metadata = read_metadata(state_dir, STATE_FORMAT_VERSION)
+        students, scores, labels = load_arrays(state_dir, ['students', 'scores', 'labels'])
+        bounds = load_arrays(state_dir, _BOUNDS_ARRAYS) if metadata.get('bounds') else None
+        return cls(students, metadata['feature_columns'], scores, labels, metadata['num_clusters'], bounds)
+
+
+def update_clusters(state_dir, new_data_path, cache_dir=None, model_dir=None):
+    """
+    Applies a CSV of new scores to the cohort saved in state_dir, prints how
+    many students changed cluster and the cluster report, and saves the
+    updated cohort (and, if model_dir is given, the updated ClusterModel).
+
+    Returns:
+        The update report (see IncrementalClusterer.update).
+    """
+    clusterer = IncrementalClusterer.load(state_dir)
+    report = clusterer.update_csv(new_data_path, cache_dir)
+    print(f"{report['new_students']} new students, {report['changed_students']} with changed scores; "
+          f"{report['changed_cluster']} existing students changed cluster.")
+    clusterer.analyze()
+    clusterer.save(state_dir)
+    if model_dir is not None:
+        clusterer.to_model().save(model_dir)
+    return report
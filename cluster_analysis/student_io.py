@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from array_store import load_arrays, read_metadata, save_arrays
+
+# Declared schema of a student scores CSV: a 'Student' name column such as
+# "Student 123" followed by one integer score column (0-100) per topic
+STUDENT_COLUMN = 'Student'
+SCORE_DTYPE = np.uint8
+SCORE_MIN, SCORE_MAX = 0, 100
+
+CACHE_FORMAT_VERSION = 1  # Caches in another format are rebuilt from the CSV
+
+
+def _student_frame(codes, categories, scores, feature_columns, student_ids):
+    """Builds the typed frame from student codes/categories and a uint8 score matrix."""
+    if student_ids == 'category':
+        students = pd.Categorical.from_codes(codes, categories=categories)
+    else:
+        numbers = pd.Series(categories).str.extract(r'(\d+)\s*$', expand=False)
+        if numbers.isna().any():
+            raise ValueError(f"Not every {STUDENT_COLUMN} name ends in a number; use student_ids='category'.")
+        students = numbers.astype(np.int64).to_numpy()[codes]
+    frame = pd.DataFrame(scores, columns=feature_columns, copy=False)
+    frame.insert(0, STUDENT_COLUMN, students)
+    return frame
+
+
+def read_student_csv(data_path, chunksize=200_000):
+    """
+    Parses a student scores CSV into compact arrays, one chunk at a time.
+
+    Scores are range-checked before being narrowed to uint8 (pandas would
+    silently wrap out-of-range values if asked to parse straight to uint8).
+
+    Returns:
+        (codes, categories, scores, feature_columns): int32 codes into the
+        array of distinct student names, and the (students x topics) uint8
+        score matrix.
+    """
+    code_chunks, name_chunks, score_chunks = [], [], []
+    for chunk in pd.read_csv(data_path, chunksize=chunksize, dtype={STUDENT_COLUMN: str}):
+        scores = chunk.drop(STUDENT_COLUMN, axis=1)
+        values = scores.to_numpy()
+        # Check the dtype first: min()/max() of a column holding text would raise TypeError
+        if not np.issubdtype(values.dtype, np.integer) or \
+                (values.size > 0 and (values.min() < SCORE_MIN or values.max() > SCORE_MAX)):
+            raise ValueError(f"{data_path}: scores must be integers from {SCORE_MIN} to {SCORE_MAX}.")
+        score_chunks.append(values.astype(SCORE_DTYPE))
+        codes, names = pd.factorize(chunk[STUDENT_COLUMN])
+        code_chunks.append(codes)
+        name_chunks.append(np.asarray(names, dtype=object))
+        feature_columns = list(scores.columns)
+
+    if not score_chunks:
+        feature_columns = [col for col in pd.read_csv(data_path, nrows=0).columns if col != STUDENT_COLUMN]
+        return (np.empty(0, dtype=np.int32), np.empty(0, dtype=str),
+                np.empty((0, len(feature_columns)), dtype=SCORE_DTYPE), feature_columns)
+
+    # Merge the per-chunk factorizations: map each chunk's local codes to global ones
+    name_codes, categories = pd.factorize(np.concatenate(name_chunks))
+    offsets = np.cumsum([0] + [len(names) for names in name_chunks[:-1]])
+    codes = np.concatenate([name_codes[offset + chunk_codes] for offset, chunk_codes in zip(offsets, code_chunks)])
+    return codes.astype(np.int32), categories.astype(str), np.concatenate(score_chunks), feature_columns
+
+
+def _source_signature(data_path):
+    stat = os.stat(data_path)
+    return {'source': os.path.abspath(data_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def load_student_data(data_path, cache_dir=None, student_ids='category'):
+    """
+    Loads a student scores CSV with compact dtypes: uint8 scores, and student
+    names as a categorical (or, with student_ids='int', as the integer parsed
+    from each name).
+
+    If cache_dir is given, the parsed arrays are saved there as .npy files the
+    first time, and later calls memory-map them instead of parsing the CSV.
+    The cache is rebuilt whenever the CSV's size or modification time changes.
+
+    Args:
+        data_path: Path to the CSV file containing student data.
+        cache_dir: Directory for the binary cache, or None to always parse the CSV.
+        student_ids: 'category' or 'int'.
+
+    Returns:
+        A DataFrame with the 'Student' column followed by the uint8 score columns.
+    """
+    if student_ids not in ('category', 'int'):
+        raise ValueError(f"student_ids must be 'category' or 'int', not {student_ids!r}")
+    if cache_dir is None:
+        return _student_frame(*read_student_csv(data_path), student_ids)
+
+    signature = _source_signature(data_path)
+    try:
+        metadata = read_metadata(cache_dir, CACHE_FORMAT_VERSION)
+    except (OSError, ValueError):
+        metadata = {}
+    if metadata.get('signature') == signature:
+        codes, categories, scores = load_arrays(cache_dir, ['student_codes', 'student_names', 'scores'],
+                                                mmap={'student_codes', 'scores'})
+        return _student_frame(codes, categories, scores, metadata['feature_columns'], student_ids)
+
+    codes, categories, scores, feature_columns = read_student_csv(data_path)
+    save_arrays(cache_dir, {'student_codes': codes, 'student_names': categories, 'scores': scores},
+                {'signature': signature, 'feature_columns': feature_columns}, CACHE_FORMAT_VERSION)
+    return _student_frame(codes, categories, scores, feature_columns, student_ids)
@@ -0,0 +1,11 @@
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# The repo's modules are plain scripts rather than packages, so make them importable,
+# along with the seeded workloads the benchmarks share.
+for path in (REPO_ROOT / "vectors" / "vectors_calculation", REPO_ROOT / "cluster_analysis",
+             REPO_ROOT / "benchmarks"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from array_store import load_arrays, read_metadata, save_arrays
+from cluster_model import ClusterModel
+from incremental_clustering import IncrementalClusterer
+from student_io import load_student_data
+
+
+def _student_frame(num_students=60, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(rng.integers(0, 101, size=(num_students, 3)), columns=['Math', 'Physics', 'Art'])
+    frame.insert(0, 'Student', [f"Student {i}" for i in range(num_students)])
+    return frame
+
+
+def test_round_trip_and_format_version(tmp_path):
+    save_arrays(tmp_path, {'a': np.arange(3), 'b': np.eye(2)}, {'note': 'x'}, format_version=2)
+    assert read_metadata(tmp_path, 2) == {'note': 'x', 'format_version': 2}
+    a, b = load_arrays(tmp_path, ['a', 'b'], mmap={'b'})
+    assert a.tolist() == [0, 1, 2] and isinstance(b, np.memmap)
+    with pytest.raises(ValueError, match="Unsupported format version 2"):
+        read_metadata(tmp_path, 3)
+
+
+def test_interrupted_write_leaves_no_metadata(tmp_path, monkeypatch):
+    save_arrays(tmp_path, {'a': np.arange(3)}, {}, format_version=1)
+    def disk_full(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(np, 'save', disk_full)
+    with pytest.raises(OSError, match="disk full"):
+        save_arrays(tmp_path, {'a': np.arange(4)}, {}, format_version=1)
+    with pytest.raises(OSError):
+        read_metadata(tmp_path, 1)
+
+
+def test_cluster_model_and_state_round_trip(tmp_path):
+    clusterer = IncrementalClusterer.fit(_student_frame(), num_clusters=3)
+    clusterer.save(tmp_path / 'state')
+    reloaded = IncrementalClusterer.load(tmp_path / 'state')
+    np.testing.assert_array_equal(reloaded.labels, clusterer.labels)
+
+    clusterer.to_model().save(tmp_path / 'model')
+    model = ClusterModel.load(tmp_path / 'model')
+    assert model.metadata['format_version'] == 1
+    new_students = _student_frame(seed=1)
+    np.testing.assert_array_equal(model.predict(new_students), clusterer.to_model().predict(new_students))
+
+
+def test_student_cache_is_rebuilt_after_a_format_change(tmp_path):
+    csv_path = tmp_path / 'students.csv'
+    _student_frame().to_csv(csv_path, index=False)
+    expected = load_student_data(csv_path)
+    pd.testing.assert_frame_equal(load_student_data(csv_path, tmp_path / 'cache'), expected)
+    pd.testing.assert_frame_equal(load_student_data(csv_path, tmp_path / 'cache'), expected)
+
+    metadata_path = tmp_path / 'cache' / 'metadata.json'
+    metadata = json.loads(metadata_path.read_text())
+    metadata_path.write_text(json.dumps({**metadata, 'format_version': 0}))
+    pd.testing.assert_frame_equal(load_student_data(csv_path, tmp_path / 'cache'), expected)
+    assert json.loads(metadata_path.read_text())['format_version'] == 1
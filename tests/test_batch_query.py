@@ -0,0 +1,44 @@
+import pytest
+
+import workloads
+from batch_query import VECTORIZE_MESSAGES_FROM, process_vector_queries
+from calc import process_vector_query
+
+# Queries the corpus rarely or never produces, at the edges of the fast paths
+EDGE_CASES = [
+    "[[-0, 1, 2], 'vector']", "[[-0.0, 1, 2], 'vector']", "[[01, 2, 3], 'vector']", "[[1, , 3], 'vector']",
+    "[[1e400, 0, 0], 'magnitude']", "[[12345678901234567, 1, 2], 'vector']", "[[1.5e-3, 2E+2, 3], 'magnitude']",
+    "[[1, 2], -0, 'scalar_multiplication']", "[2, [1, 2, 3], 'scalar_multiplication']",
+    "[[1, 2, 3], 5, 'magnitude']", "[[1, 2, 3], [4, 5, 6], 'Dot_Product']", "[[1, 2, 3], [4, 5, 6], 'dot_product1']",
+    "  [ [1 , 2 ,3] , [4,5, 6] , 'addition' ]  ", "[[1, 2, 3], [4, 5, 6], 'cross_product',]",
+    "[[1, 2, 3], [4, 5, 6], [7, 8, 9], 'vectors']", "[[1, 2, 3], [4, 5, 6]]", "[[0, 0, 0], [1, 2, 3], 'angle']",
+    "[[1, 2, 3], [0, 0], 'projection_vector']", "", "[]", "[[1, 2, 3], 'magnitude'",
+]
+
+HUGE = "1" + "0" * 400
+OVERFLOW_QUERIES = [
+    f"[[{HUGE}, 2, 3], 'vector']",
+    f"[[1, 2, 3], [{HUGE}, 5, 6], 'addition']",
+    f"[[1, 2, 3], {HUGE}, 'scalar_multiplication']",
+]
+
+
+@pytest.mark.parametrize("size", [5, VECTORIZE_MESSAGES_FROM * 50])
+def test_batch_matches_scalar_path(size):
+    queries = workloads.query_corpus(size, seed=size) + EDGE_CASES
+    expected = [repr(process_vector_query(query)) for query in queries]
+    assert [repr(output) for output in process_vector_queries(queries)] == expected
+
+
+@pytest.mark.parametrize("query", OVERFLOW_QUERIES)
+def test_integer_beyond_float_range_is_a_row_error(query):
+    output = process_vector_query(query)
+    assert output["error_message"] == f"Error processing input: int too large to convert to float. Input: '{query}'"
+
+
+def test_overflow_row_leaves_the_rest_of_the_batch():
+    queries = workloads.query_corpus(200, seed=1, error_rate=0.0) + OVERFLOW_QUERIES
+    outputs = process_vector_queries(queries)
+    assert [repr(output) for output in outputs] == [repr(process_vector_query(query)) for query in queries]
+    overflowed = ["int too large" in (output["error_message"] or "") for output in outputs]
+    assert overflowed == [False] * 200 + [True] * len(OVERFLOW_QUERIES)
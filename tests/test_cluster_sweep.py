@@ -0,0 +1,19 @@
+import numpy as np
+from sklearn.cluster import KMeans
+
+from cluster_sweep import sweep_num_clusters
+
+MATRIX = np.random.default_rng(0).normal(size=(300, 4))
+
+
+def test_parallel_sweep_matches_in_process_sweep():
+    serial, serial_model = sweep_num_clusters(MATRIX, k_values=[2, 3], seeds=[0, 1], workers=1)
+    parallel, parallel_model = sweep_num_clusters(MATRIX, k_values=[2, 3], seeds=[0, 1], workers=2)
+    assert serial.drop(columns="fit_time").equals(parallel.drop(columns="fit_time"))
+    np.testing.assert_array_equal(serial_model.cluster_centers_, parallel_model.cluster_centers_)
+
+
+def test_best_model_keeps_its_labels():
+    _, best_model = sweep_num_clusters(MATRIX, k_values=[2, 3], seeds=[0], workers=2)
+    refit = KMeans(n_clusters=best_model.n_clusters, n_init=1, random_state=best_model.random_state).fit(MATRIX)
+    np.testing.assert_array_equal(best_model.labels_, refit.labels_)
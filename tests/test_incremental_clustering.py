@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from incremental_clustering import IncrementalClusterer
+
+
+def _cohort(num_students=500, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(rng.integers(0, 101, size=(num_students, 4)), columns=['Math', 'Physics', 'Art', 'Music'])
+    frame.insert(0, 'Student', [f"Student {i}" for i in range(num_students)])
+    return frame
+
+
+def test_loaded_state_keeps_its_bounds_and_updates_like_a_rebuilt_one(tmp_path):
+    clusterer = IncrementalClusterer.fit(_cohort(), num_clusters=4)
+    clusterer.save(tmp_path)
+    loaded = IncrementalClusterer.load(tmp_path)
+    np.testing.assert_array_equal(loaded._upper, clusterer._upper)
+    np.testing.assert_array_equal(loaded._lower, clusterer._lower)
+
+    rebuilt = IncrementalClusterer(clusterer.assignments()['Student'], clusterer.feature_columns,
+                                   clusterer._scores, clusterer.labels, clusterer.num_clusters)
+    new_scores = _cohort(seed=1).iloc[::5].assign(Test=50)
+    assert loaded.update(new_scores) == rebuilt.update(new_scores)
+    np.testing.assert_array_equal(loaded.labels, rebuilt.labels)
+
+
+def test_rejects_bounds_of_another_cohort(tmp_path):
+    clusterer = IncrementalClusterer.fit(_cohort(), num_clusters=4)
+    bounds = (clusterer._upper[:-1], clusterer._lower[:-1], *clusterer._reference)
+    with pytest.raises(ValueError, match="Bounds"):
+        IncrementalClusterer(clusterer.assignments()['Student'], clusterer.feature_columns, clusterer._scores,
+                             clusterer.labels, clusterer.num_clusters, bounds)
@@ -0,0 +1,47 @@
+import pytest
+
+from calc import process_vector_query
+from query_cache import QueryCache
+
+QUERY = "[[1, 2, 3], [4, 5, 6], 'cross_product']"
+
+
+def test_returned_results_do_not_share_state_with_the_cache():
+    cache = QueryCache()
+    first = process_vector_query(QUERY, cache=cache)
+    expected = repr(first)
+    first["input_vectors_coords"][0][0] = 99.0
+    first["result_vector_coords"][0] = 99.0
+    first["display_message"] = "changed"
+
+    second = process_vector_query(QUERY, cache=cache)
+    assert cache.stats()["hits"] == 1
+    assert repr(second) == expected
+    second["input_vectors_coords"].append([0.0, 0.0, 0.0])
+    assert repr(process_vector_query(QUERY, cache=cache)) == expected
+
+
+def test_equivalent_queries_share_an_entry_but_signed_zeros_do_not():
+    cache = QueryCache()
+    process_vector_query("[[1,0,0],[0,1,0],'cross_product']", cache=cache)
+    process_vector_query("[[1, 0, 0], [0, 1, 0], 'Cross_Product']", cache=cache)
+    process_vector_query("[[1, -0.0, 0], [0, 1, 0], 'cross_product']", cache=cache)
+    assert (cache.stats()["hits"], len(cache)) == (1, 2)
+
+
+def test_errors_are_not_cached():
+    cache = QueryCache()
+    process_vector_query("[[0, 0, 0], 'unit_vector']", cache=cache)
+    assert len(cache) == 0
+
+
+def test_evicts_least_recently_used():
+    cache = QueryCache(maxsize=2)
+    for query in ("[[1, 2, 3], 'magnitude']", "[[4, 5, 6], 'magnitude']", "[[1, 2, 3], 'magnitude']",
+                  "[[7, 8, 9], 'magnitude']"):
+        process_vector_query(query, cache=cache)
+    assert cache.stats()["evictions"] == 1
+    process_vector_query("[[1, 2, 3], 'magnitude']", cache=cache)
+    assert cache.stats()["hits"] == 2
+    with pytest.raises(ValueError):
+        QueryCache(maxsize=0)
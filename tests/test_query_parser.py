@@ -0,0 +1,52 @@
+import ast
+import re
+
+import pytest
+
+import workloads
+from calc import process_vector_query
+from query_parser import MAX_QUERY_LENGTH, parse_literal
+
+# Inputs on both sides of the fast path's grammar
+LITERALS = [
+    "[[1, 2, 3], 'vector']", " [ [1,2] , -0 , 'scalar_multiplication' ] ", "[[1e400, -0.0, 1E-5], 'magnitude']",
+    "[[1, 2, 3], 'vector',]", "[[1., 2, 3], 'vector']", "[[+1, 2, 3], 'vector']", "[[01, 2, 3], 'vector']",
+    "[[1, 2, 3], \"vector\"]", "[[1, 2, 3], 'vec\\'tor']", "[[1, 2, 3], 'vec\"tor']", "[[1, 2, 3], 'vé']",
+    "[[1" + "0" * 5000 + ", 2, 3], 'vector']", "[[[1, 2, 3]], 'vector']", "[{}, 'vector']", "[[1, 2, 3], vector]",
+    "[[1, 2, 3], 'vector'", "[]", "", "1", "[[True, 2, 3], 'vector']", "[[1, 2, 3]\n, 'vector']",
+]
+
+
+def _outcome(parse, text):
+    try:
+        return "ok", repr(parse(text))
+    except (ValueError, SyntaxError, TypeError) as e:
+        return type(e).__name__, re.sub(r" at 0x[0-9a-f]+", "", str(e))
+
+
+@pytest.mark.parametrize("text", LITERALS, ids=range(len(LITERALS)))
+def test_parse_literal_matches_literal_eval(text):
+    assert _outcome(parse_literal, text) == _outcome(ast.literal_eval, text)
+
+
+def test_parse_literal_matches_literal_eval_on_corpus():
+    texts = workloads.query_corpus(2000, seed=3)
+    assert [_outcome(parse_literal, text) for text in texts] == [_outcome(ast.literal_eval, text) for text in texts]
+
+
+def test_rejects_long_input_before_parsing():
+    with pytest.raises(ValueError, match=f"maximum length of {MAX_QUERY_LENGTH} characters"):
+        parse_literal("[" * (MAX_QUERY_LENGTH + 1))
+
+
+@pytest.mark.parametrize("query, message", [
+    ("[]", "Input must be a non-empty list."),
+    ("[[1, 2, 3], 5]", "Operation must be a string and the last element, or input must be a list of vectors."),
+    ("[[1], 'vector']", "Invalid vector format or number of components: [1]"),
+    ("['vector']", "No valid vector data found."),
+    ("[[1, 2, 3], 'vector'", "'[' was never closed (<unknown>, line 1)"),
+    ("x" * (MAX_QUERY_LENGTH + 1), f"Input exceeds the maximum length of {MAX_QUERY_LENGTH} characters."),
+], ids=["empty", "no-operation", "short-vector", "no-vectors", "unclosed", "too-long"])
+def test_error_messages(query, message):
+    output_data = process_vector_query(query)
+    assert output_data["error_message"] == f"Error processing input: {message}. Input: '{query}'"
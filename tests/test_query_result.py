@@ -0,0 +1,27 @@
+import pytest
+
+import workloads
+from batch_query import process_vector_queries
+from calc import process_vector_query
+from query_result import QueryResult
+from test_batch_query import EDGE_CASES
+
+
+@pytest.mark.parametrize("size", [5, 2000])
+def test_records_match_output_data(size):
+    queries = workloads.query_corpus(size, seed=size) + EDGE_CASES
+    expected = [repr(process_vector_query(query)) for query in queries]
+    assert [repr(record.to_dict()) for record in process_vector_queries(queries, as_records=True)] == expected
+    assert [repr(process_vector_query(query, as_record=True).to_dict()) for query in queries] == expected
+
+
+def test_display_message_is_rendered_when_first_read():
+    record = process_vector_query("[[1, 2], 2.5, 'scalar_multiplication']", as_record=True)
+    assert record._display_message is None
+    assert record.display_message == "2.5 * (1.00, 2.00, 0.00) = (2.50, 5.00, 0.00)"
+    assert record.input_vectors_coords == ((1.0, 2.0, 0.0),)
+
+
+def test_from_dict_round_trips():
+    output_data = process_vector_query("[[1, 2, 3], [4, 5, 6], 'dot_product']")
+    assert QueryResult.from_dict(output_data).to_dict() == output_data
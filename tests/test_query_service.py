@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+import query_service
+from calc import process_vector_query
+from query_service import VectorQueryService
+
+QUERIES = ["[[1, 2, 3], 'magnitude']", "boom", "[[1, 2, 3], [4, 5, 6], 'dot_product']", "[[1, 2], 'vector']"]
+
+
+def _failing_on_boom(input_strings):
+    if "boom" in input_strings:
+        raise RuntimeError("boom")
+    return [process_vector_query(input_string) for input_string in input_strings]
+
+
+async def _submit_all(service, queries):
+    return await asyncio.gather(*(service.submit(query) for query in queries), return_exceptions=True)
+
+
+def test_batches_return_each_callers_own_result():
+    async def run():
+        async with VectorQueryService(batch_window=0.01) as service:
+            return await service.submit_many(queries), service.stats()
+
+    queries = [query for query in QUERIES if query != "boom"]
+    results, stats = asyncio.run(run())
+    assert results == [process_vector_query(query) for query in queries]
+    assert stats["batches"] == 1 and stats["queries"] == len(queries)
+
+
+def test_exception_fails_only_the_query_that_raised_it(monkeypatch):
+    monkeypatch.setattr(query_service, "process_vector_queries", _failing_on_boom)
+
+    async def run():
+        async with VectorQueryService(batch_window=0.01) as service:
+            return await _submit_all(service, QUERIES)
+
+    results = asyncio.run(run())
+    assert isinstance(results[1], RuntimeError)
+    for index in (0, 2, 3):
+        assert results[index] == process_vector_query(QUERIES[index])
+
+
+def test_rejects_invalid_settings():
+    with pytest.raises(ValueError, match="max_batch_size"):
+        VectorQueryService(max_batch_size=0)
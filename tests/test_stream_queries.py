@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from calc import process_vector_query
+from stream_queries import main, stream_results
+
+HUGE = "1" + "0" * 400
+LINES = [
+    f"[[{HUGE}, 2, 3], 'vector']",
+    "[[1, 2, 3], 'magnitude']",
+    "",
+    '{"query": "[[1, 2, 3], [4, 5, 6], \'dot_product\']"}',
+    '{"query": ',
+    f"\"[[1, 2, 3], {HUGE}, 'scalar_multiplication']\"",
+    "[[1, 2, 3], [4, 5, 6], 'addition']",
+]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_every_line_gets_its_own_record(workers):
+    records = list(stream_results(LINES, chunk_size=2, workers=workers))
+    assert [record["line"] for record in records] == [1, 2, 4, 5, 6, 7]
+    errors = [record["error_message"] for record in records]
+    assert "int too large to convert to float" in errors[0]
+    assert "int too large to convert to float" in errors[4]
+    assert errors[3].startswith("Error processing input: Expecting value")
+    assert records[1] == {"line": 2, **process_vector_query("[[1, 2, 3], 'magnitude']")}
+    assert records[2]["scalar_result"] == 32.0
+    assert records[5]["result_vector_coords"] == [5.0, 7.0, 9.0]
+
+
+def test_cli_writes_one_json_line_per_query(tmp_path, capsys):
+    source = tmp_path / "queries.txt"
+    source.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+    assert main([str(source), "--chunk-size", "3"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["line"] for line in lines] == [1, 2, 4, 5, 6, 7]
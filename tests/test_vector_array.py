@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+import workloads
+from calc import Vector
+from check_equivalence import EDGE_CASES, check_vector_array
+from vector_array import VectorArray
+
+
+def test_operations_match_vector_methods():
+    mismatches = check_vector_array(workloads.query_corpus(2000, seed=0) + EDGE_CASES)
+    assert mismatches == dict.fromkeys(mismatches, 0)
+
+
+def test_zero_vectors_are_masked_rather_than_raising():
+    vectors = VectorArray([[0, 0, 0], [3, 4, 0]])
+    units, zero = vectors.unit_vector()
+    assert zero.tolist() == [True, False]
+    assert units.data[1].tolist() == [0.6, 0.8, 0.0]
+    with pytest.raises(ValueError):
+        Vector(0, 0, 0).unit_vector()
+
+
+def test_round_trips_through_vectors():
+    vectors = [Vector(1, 2, 3), Vector(-0.0, 0.5, 1e10)]
+    array = VectorArray.from_vectors(vectors)
+    assert [str(vector) for vector in array.to_vectors()] == [str(vector) for vector in vectors]
+    np.testing.assert_array_equal(array.x, [1.0, -0.0])
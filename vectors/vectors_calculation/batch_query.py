@@ -0,0 +1,385 @@
+import math
+import re
+from itertools import repeat
+from string import Formatter
+
+import numpy as np
+
+from calc import (DISPLAY_FORMATS, new_output_data, parse_query,
+                  process_vector_query, scalar_multiplication_factor, set_error)
+from query_parser import MAX_QUERY_LENGTH, NUMBER_CHARACTERS, QUERY_SIGNATURE
+from query_result import QueryResult, vector_string
+from vector_array import VectorArray
+
+def _format_strings(values, format_spec):
+    """Returns format(value, format_spec) for each of an array of floats, as an array of strings."""
+    # Query components repeat a lot, so each distinct value (by bit pattern, to keep -0.0) is formatted once
+    distinct, inverse = np.unique(values.view(np.uint64), return_inverse=True)
+    return np.array([format(value, format_spec) for value in distinct.view(np.float64).tolist()])[inverse]
+
+
+def _vector_strings(data):
+    """Formats each row of an (N, 3) array the way Vector.__str__ does, as an array of strings."""
+    components = _format_strings(data.ravel(), ".2f").reshape(-1, 3)
+    text = np.char.add("(", components[:, 0])
+    for column in (1, 2):
+        text = np.char.add(np.char.add(text, ", "), components[:, column])
+    return np.char.add(text, ")")
+
+
+# Vectorized kernels, keyed by operation label. Each takes the VectorArray of first
+# operands, the VectorArray of second operands (or None) and the array of scalars
+# (or None), and returns (result, zero_mask, zero_message). result is either a
+# VectorArray or an array of scalars; zero_mask is None for operations that cannot fail.
+def _kernel_vector(a, b, scalars):
+    return a, None, None
+
+
+def _kernel_magnitude(a, b, scalars):
+    return a.modulus(), None, None
+
+
+def _kernel_unit_vector(a, b, scalars):
+    result, zero = a.unit_vector()
+    return result, zero, "Zero vector does not have unit vector."
+
+
+def _kernel_angle(a, b, scalars):
+    # math.acos rather than np.arccos, which can differ in the last bit from the scalar path
+    cos_angle, zero = a.cos_angle(b)
+    result = np.fromiter(map(math.acos, cos_angle.tolist()), dtype=np.float64, count=len(cos_angle))
+    return np.degrees(result), zero, "Cannot calculate angle with zero vector."
+
+
+def _kernel_length_of_proj(a, b, scalars):
+    result, zero = a.length_of_proj(b)
+    return result, zero, "Cannot project onto a zero vector."
+
+
+def _kernel_projection_vector(a, b, scalars):
+    result, zero = a.projection_vector(b)
+    return result, zero, "Cannot project onto a zero vector."
+
+
+def _kernel_scalar_multiplication(a, b, scalars):
+    return a.multiply(scalars), None, None
+
+
+KERNELS = {
+    ("vector", 1): _kernel_vector,
+    ("magnitude", 1): _kernel_magnitude,
+    ("unit_vector", 1): _kernel_unit_vector,
+    ("addition", 2): lambda a, b, scalars: (a.add(b), None, None),
+    ("subtract", 2): lambda a, b, scalars: (a.subtract(b), None, None),
+    ("dot_product", 2): lambda a, b, scalars: (a.dot_product(b), None, None),
+    ("cross_product", 2): lambda a, b, scalars: (a.cross_product(b), None, None),
+    ("angle", 2): _kernel_angle,
+    ("length_of_proj", 2): _kernel_length_of_proj,
+    ("projection_vector", 2): _kernel_projection_vector,
+    ("distance", 2): lambda a, b, scalars: (a.distance(b), None, None),
+    ("scalar_multiplication", 1): _kernel_scalar_multiplication,
+}
+
+
+def _run_group(operation_label, arity, indices, data, scalars, input_strings, results, as_records=False):
+    """
+    Evaluates one (operation_label, arity) group with a single vectorized kernel.
+    data is the (N, arity, 3) array of input components and scalars the array of
+    factors for scalar_multiplication (None for other operations).
+    """
+    input_coords = data.tolist()
+    a = VectorArray(data[:, 0])
+    b = VectorArray(data[:, 1]) if arity == 2 else None
+
+    result, zero_mask, zero_message = KERNELS[(operation_label, arity)](a, b, scalars)
+    is_vector = isinstance(result, VectorArray)
+    failed = zero_mask.tolist() if zero_mask is not None else None
+    if as_records:
+        _store_records(operation_label, indices, input_coords, result, is_vector, failed, zero_message,
+                       scalars.tolist() if scalars is not None else None, input_strings, results)
+        return
+    values = result.data.tolist() if is_vector else result.tolist()
+    messages = _format_messages(operation_label, a, b, result, scalars)
+
+    for row, index in enumerate(indices):
+        if failed is not None and failed[row]:
+            results[index] = _error_output(operation_label, input_coords[row], ValueError(zero_message),
+                                           input_strings[index])
+            continue
+        # Same keys, in the same order, as new_output_data
+        results[index] = {
+            "input_vectors_coords": input_coords[row],
+            "result_vector_coords": values[row] if is_vector else None,
+            "scalar_result": None if is_vector else values[row],
+            "operation_name": operation_label,
+            "display_message": messages[row],
+            "error_message": None,
+        }
+
+
+# Below this many rows, formatting each message on its own is faster than the
+# fixed cost of the array operations.
+VECTORIZE_MESSAGES_FROM = 40
+
+
+def _format_messages(operation_label, a, b, result, scalars):
+    """
+    Formats DISPLAY_FORMATS[operation_label] for every row of a group. Each
+    field is formatted for all rows at once, then the rows are filled into
+    the format with its fields renumbered and their format specs removed.
+    Small groups are formatted row by row, as process_vector_query does.
+    """
+    if len(a.data) < VECTORIZE_MESSAGES_FROM:
+        operands = [list(map(vector_string, vectors.data.tolist())) for vectors in (a, b) if vectors is not None]
+        values = map(vector_string, result.data.tolist()) if isinstance(result, VectorArray) else result.tolist()
+        factors = scalars.tolist() if scalars is not None else repeat(None)
+        message_format = DISPLAY_FORMATS[operation_label]
+        return [message_format.format(*row_operands, result=value, scalar=factor)
+                for row_operands, value, factor in zip(zip(*operands), values, factors)]
+
+    values = {"0": a, "1": b, "result": result, "scalar": scalars}
+    template, columns, positions = [], [], {}
+    for literal, field_name, format_spec, _ in Formatter().parse(DISPLAY_FORMATS[operation_label]):
+        template.append(literal.replace("{", "{{").replace("}", "}}"))
+        if field_name is None:
+            continue
+        if field_name not in positions:
+            positions[field_name] = len(columns)
+            value = values[field_name]
+            if isinstance(value, VectorArray):
+                columns.append(_vector_strings(value.data).tolist())
+            else:
+                columns.append(_format_strings(value, format_spec).tolist())
+        template.append(f"{{{positions[field_name]}}}")
+    template = "".join(template)
+    return [template.format(*row) for row in zip(*columns)]
+
+
+def _error_output(operation_label, input_coords, error, input_string):
+    output_data = new_output_data()
+    output_data["operation_name"] = operation_label
+    output_data["input_vectors_coords"] = input_coords
+    set_error(output_data, error, input_string)
+    return output_data
+
+
+def _store_records(operation_label, indices, input_coords, result, is_vector, failed, zero_message, scalars,
+                   input_strings, results):
+    """Stores a group's results as QueryResult records; no message is formatted here."""
+    values = map(tuple, result.data.tolist()) if is_vector else result.tolist()
+    factors = scalars if scalars is not None else [None] * len(indices)
+    for row, (index, coords, value, factor) in enumerate(zip(indices, input_coords, values, factors)):
+        coords = tuple(map(tuple, coords))
+        if failed is not None and failed[row]:
+            output_data = _error_output(operation_label, [], ValueError(zero_message), input_strings[index])
+            results[index] = QueryResult(operation_label, coords, None, None, output_data["error_message"])
+        elif is_vector:
+            results[index] = QueryResult(operation_label, coords, value, None, None, factor)
+        else:
+            results[index] = QueryResult(operation_label, coords, None, value)
+
+
+_BRACKETS = str.maketrans("", "", "[]")
+_BLANKS = str.maketrans("", "", " \t")
+_COMMA, _PLUS, _MINUS, _DOT, _ZERO, _E = b",+-.0e"
+
+
+def _read_numbers(text):
+    """
+    Converts comma-separated numbers to a float64 array. Returns None unless
+    every token is a number literal that float() of the parsed literal gives
+    the same value for.
+
+    Each token is converted as float() would, which raises ValueError for one
+    that is not a number; the caller then parses those queries one by one.
+    The tokens float() reads differently from the literal grammar are rejected
+    up front, on the bytes of the text without whitespace: empty tokens,
+    integers with a leading zero (a SyntaxError as a literal), the integer -0
+    (the literal is 0, not -0.0) and integers of 17 or more digits (float()
+    of a huge one raises, where the text reads as inf).
+    """
+    raw = np.frombuffer(f",{text.translate(_BLANKS)},".encode("ascii"), dtype=np.uint8)
+    commas = np.flatnonzero(raw == _COMMA)
+    starts, ends = commas[:-1] + 1, commas[1:]
+    lengths = ends - starts
+    if not lengths.all():
+        return None
+    first = raw[starts]
+    signed = (first == _PLUS) | (first == _MINUS)
+    marks = np.cumsum((raw == _DOT) | ((raw | 0x20) == _E))
+    integer = marks[ends - 1] == marks[starts - 1]
+    digits = lengths - signed
+    leading_zero = (raw[starts + signed] == _ZERO) & ((digits > 1) | (first == _MINUS))
+    if (integer & (leading_zero | (digits > 16))).any():
+        return None
+
+    try:
+        return np.array(text.split(","), dtype=np.float64)
+    except ValueError:
+        return None
+
+
+def _read_groups(texts):
+    """
+    Reads the numbers of several groups of query bodies (each number followed
+    by a comma) with one _read_numbers call. If any group is unreadable, each
+    is read on its own instead, so only that group is lost. Returns an array,
+    or None, per group.
+    """
+    if not texts:
+        return []
+    values = _read_numbers("".join(texts).translate(_BRACKETS).rstrip(" \t")[:-1])
+    counts = [text.count(",") for text in texts]
+    if values is not None and len(values) == sum(counts):
+        return np.split(values, np.cumsum(counts)[:-1])
+    return [_read_numbers(text.translate(_BRACKETS).rstrip(" \t")[:-1]) for text in texts]
+
+
+def _read_common_queries(input_strings, chunks, results):
+    """
+    Reads the queries of the usual shape (see query_parser.QUERY_SIGNATURE) in
+    bulk. Queries are grouped by signature, and the numbers of all groups are
+    converted together (see _read_groups). Kernel inputs are added to chunks,
+    as (indices, data, scalars); 'vectors' results, and the errors of queries
+    no kernel covers, are stored in results.
+
+    Returns:
+        The indices of all other queries, to be parsed one by one.
+    """
+    candidates = [index for index, input_string in enumerate(input_strings)
+                  if type(input_string) is str and len(input_string) <= MAX_QUERY_LENGTH]
+    others = []
+    if len(candidates) < len(input_strings):
+        others = sorted(set(range(len(input_strings))).difference(candidates))
+    texts = [input_strings[index] for index in candidates]
+    signatures = "\n".join(texts).translate(NUMBER_CHARACTERS).split("\n")
+    if len(signatures) != len(texts): # a query contains a newline
+        signatures = [text.translate(NUMBER_CHARACTERS) for text in texts]
+
+    by_signature = {}
+    for index, signature in zip(candidates, signatures):
+        indices = by_signature.get(signature)
+        if indices is None:
+            by_signature[signature] = [index]
+        else:
+            indices.append(index)
+
+    readable = []  # (indices, dims, has_scalar, key, text of the numbers) per signature
+    for signature, indices in by_signature.items():
+        matched = QUERY_SIGNATURE.fullmatch(signature)
+        if matched is None:
+            others.extend(indices)
+            continue
+        vectors, scalar, tail = matched.groups()
+        operation_label = tail[1:tail.index("'", 1)].lower()
+        dims = [vector.count(",") + 1 for vector in re.findall(r"\[[^\]]*\]", vectors)]
+        key = (operation_label, len(dims))
+        has_kernel = key in KERNELS and (scalar is not None) == (operation_label == "scalar_multiplication")
+        if not has_kernel and not (operation_label == "vectors" and scalar is None):
+            # Wrong arity or an unsupported operation: the error comes from process_vector_query
+            for index in indices:
+                results[index] = process_vector_query(input_strings[index])
+            continue
+
+        # The label must be the one in the signature: digits or signs in it were deleted there
+        texts = list(map(input_strings.__getitem__, indices))
+        if not all(map(str.endswith, texts, repeat(tail))):
+            ends_with_tail = [text.endswith(tail) for text in texts]
+            others.extend(index for index, ok in zip(indices, ends_with_tail) if not ok)
+            indices = [index for index, ok in zip(indices, ends_with_tail) if ok]
+            texts = [text for text, ok in zip(texts, ends_with_tail) if ok]
+            if not indices:
+                continue
+        # Every query holds its label's quotes only, so this removes exactly one tail
+        # per query; each query then ends with the comma before the operation string.
+        readable.append((indices, dims, scalar is not None, key, "".join(texts).replace(tail, "")))
+
+    group_values = _read_groups([numbers_text for *_, numbers_text in readable])
+    for (indices, dims, has_scalar, key, _), values in zip(readable, group_values):
+        per_query = sum(dims) + has_scalar
+        if values is None or len(values) != len(indices) * per_query:
+            others.extend(indices)
+            continue
+
+        values = values.reshape(len(indices), per_query)
+        data = np.zeros((len(indices), len(dims), 3))
+        column = 0
+        for vector, dim in enumerate(dims):
+            data[:, vector, :dim] = values[:, column:column + dim]
+            column += dim
+        if key[0] == "vectors":
+            for index, coords in zip(indices, data.tolist()):
+                output_data = new_output_data()
+                output_data["input_vectors_coords"] = coords
+                output_data["operation_name"] = "vectors"
+                output_data["display_message"] = DISPLAY_FORMATS["vectors"]
+                results[index] = output_data
+        else:
+            chunks.setdefault(key, []).append((indices, data, values[:, -1] if has_scalar else None))
+    return others
+
+
+def process_vector_queries(input_strings, as_records=False):
+    """
+    Processes a batch of query strings, returning one output_data dict per input
+    in input order. Results and messages match process_vector_query.
+
+    Queries of the usual shape (vectors of plain numbers, an optional scalar
+    and an operation) are read in bulk by _read_common_queries; the rest are
+    parsed with parse_query. Queries are grouped by operation and number of
+    vectors, each group is evaluated with one vectorized kernel and its
+    display messages are formatted with array operations. Queries no kernel
+    covers (wrong arity, unsupported operations, malformed scalar
+    multiplication) are rare and go through process_vector_query directly.
+
+    With as_records=True a QueryResult (see query_result.py) is returned per
+    input instead of a dict. Display messages are then only formatted when
+    read, which saves time and memory when only the numbers are needed.
+    """
+    input_strings = list(input_strings)
+    results = [None] * len(input_strings)
+    chunks = {}  # (operation_label, arity) -> [(indices, data, scalars), ...]
+    parsed = {}  # (operation_label, arity) -> (indices, component lists, scalars) from parse_query
+
+    for index in _read_common_queries(input_strings, chunks, results):
+        input_string = input_strings[index]
+        output_data = new_output_data()
+        try:
+            operation_label, raw_vector_data, components_list = parse_query(input_string, output_data)
+            scalar = (scalar_multiplication_factor(raw_vector_data)
+                      if operation_label == "scalar_multiplication" else None)
+        except (ValueError, SyntaxError, TypeError, ZeroDivisionError) as e:
+            set_error(output_data, e, input_string)
+            results[index] = output_data
+            continue
+
+        arity = len(components_list)
+        if operation_label == "scalar_multiplication" and scalar is None:
+            arity = None
+        if operation_label == "vectors":
+            output_data["display_message"] = DISPLAY_FORMATS["vectors"]
+        elif (operation_label, arity) in KERNELS:
+            group = parsed.setdefault((operation_label, arity), ([], [], []))
+            group[0].append(index)
+            group[1].extend(components_list)
+            group[2].append(scalar)
+            continue
+        else:
+            output_data = process_vector_query(input_string)
+        results[index] = output_data
+
+    for (operation_label, arity), (indices, components, scalars) in parsed.items():
+        data = np.array(components, dtype=np.float64).reshape(len(indices), arity, 3)
+        scalars = np.array(scalars, dtype=np.float64) if operation_label == "scalar_multiplication" else None
+        chunks.setdefault((operation_label, arity), []).append((indices, data, scalars))
+
+    for (operation_label, arity), group in chunks.items():
+        indices = [index for chunk_indices, _, _ in group for index in chunk_indices]
+        data = np.concatenate([data for _, data, _ in group])
+        scalars = (np.concatenate([scalars for _, _, scalars in group])
+                   if operation_label == "scalar_multiplication" else None)
+        _run_group(operation_label, arity, indices, data, scalars, input_strings, results, as_records)
+
+    if as_records:
+        return [result if isinstance(result, QueryResult) else QueryResult.from_dict(result) for result in results]
+    return results
@@ -1,9 +1,14 @@
 import math
-import ast
+from time import perf_counter
+
+from query_parser import parse_literal
 
 # Your Vector, Point, Plane classes remain the same as you provided.
 # I'll include Vector class here for completeness of the processing part.
 class Vector:
+    # Slots instead of a per-instance __dict__: far smaller objects, faster attribute access
+    __slots__ = ("x", "y", "z")
+
     def __init__(self, x, y, z):
         """Constructor"""
         self.x = float(x) # Ensure components are floats for calculations
@@ -15,67 +20,146 @@ class Vector:
         # Format to a reasonable number of decimal places if they are floats
         return f"({self.x:.2f}, {self.y:.2f}, {self.z:.2f})"
 
+    def __repr__(self):
+        return f"{type(self).__name__}({self.x!r}, {self.y!r}, {self.z!r})"
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+        yield self.z
+
+    def __eq__(self, other):
+        if not isinstance(other, Vector):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y and self.z == other.z
+
+    __hash__ = None # Mutable; use FrozenVector as a dict key or set member
+
+    def __add__(self, other):
+        if not isinstance(other, Vector):
+            return NotImplemented
+        return self.add(other)
+
+    def __sub__(self, other):
+        if not isinstance(other, Vector):
+            return NotImplemented
+        return self.subtract(other)
+
+    def __mul__(self, scalar):
+        if isinstance(scalar, Vector):
+            return NotImplemented # Use @ for the dot product
+        return self.multiply(scalar)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar):
+        return self.divide(scalar)
+
+    def __matmul__(self, other):
+        """v1 @ v2 is the dot product."""
+        if not isinstance(other, Vector):
+            return NotImplemented
+        return self.dot_product(other)
+
+    def __neg__(self):
+        return self.__class__(-self.x, -self.y, -self.z)
+
     def modulus(self):
-        return math.sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2)
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    # Results are built with self.__class__ so FrozenVector operations stay frozen.
+    # The methods below compute each modulus once and allocate only the returned
+    # object, with the same floating point operations as the unfused versions.
 
     def add(self, other):
-        return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
+        return self.__class__(self.x + other.x, self.y + other.y, self.z + other.z)
 
     def subtract(self, other):
-        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+        return self.__class__(self.x - other.x, self.y - other.y, self.z - other.z)
 
     def multiply(self, scalar): # Renamed from your code to avoid conflict if 'scalar' is a type
         s = float(scalar)
-        return Vector(self.x * s, self.y * s, self.z * s)
+        return self.__class__(self.x * s, self.y * s, self.z * s)
 
     def divide(self, scalar_val): # Renamed from your code
         s = float(scalar_val)
         if s == 0:
             raise ValueError("Cannot divide by zero")
-        return Vector(self.x / s, self.y / s, self.z / s)
+        return self.__class__(self.x / s, self.y / s, self.z / s)
 
     def unit_vector(self):
         modulus_self = self.modulus()
         if modulus_self == 0:
             raise ValueError("Zero vector does not have unit vector.")
-        return self.divide(modulus_self)
+        return self.__class__(self.x / modulus_self, self.y / modulus_self, self.z / modulus_self)
 
     def dot_product(self, other):
         return self.x * other.x + self.y * other.y + self.z * other.z
 
     def cross_product(self, other):
-        return Vector(self.y * other.z - self.z * other.y,
-                      self.z * other.x - self.x * other.z,
-                      self.x * other.y - self.y * other.z)
+        return self.__class__(self.y * other.z - self.z * other.y,
+                              self.z * other.x - self.x * other.z,
+                              self.x * other.y - self.y * other.x)
 
     def angle(self, other):
-        dot = self.dot_product(other)
-        mod_self = self.modulus()
-        mod_other = other.modulus()
+        x, y, z = self.x, self.y, self.z
+        ox, oy, oz = other.x, other.y, other.z
+        mod_self = math.sqrt(x * x + y * y + z * z)
+        mod_other = math.sqrt(ox * ox + oy * oy + oz * oz)
         if mod_self == 0 or mod_other == 0:
             raise ValueError("Cannot calculate angle with zero vector.")
-        cos_angle = dot / (mod_self * mod_other)
+        cos_angle = (x * ox + y * oy + z * oz) / (mod_self * mod_other)
         # Clamp value to avoid domain errors with acos due to potential floating point inaccuracies
         cos_angle = max(-1.0, min(1.0, cos_angle))
         return math.acos(cos_angle)
 
     def length_of_proj(self, other):
-        if other.modulus() == 0:
+        mod_other = other.modulus()
+        if mod_other == 0:
             raise ValueError("Cannot project onto a zero vector.")
-        return self.dot_product(other) / other.modulus()
+        return self.dot_product(other) / mod_other
 
     def projection_vector(self, other):
-        if other.modulus() == 0:
+        mod_other = other.modulus()
+        if mod_other == 0:
             raise ValueError("Cannot project onto a zero vector.")
-        unit_vector_other = other.unit_vector() # Handles zero vector case internally now
-        len_proj = self.dot_product(other) / other.modulus() # Corrected projection length calculation
-        return unit_vector_other.multiply(len_proj)
-
+        len_proj = self.dot_product(other) / mod_other
+        # Unit vector of other, scaled by the projection length
+        return self.__class__(other.x / mod_other * len_proj,
+                              other.y / mod_other * len_proj,
+                              other.z / mod_other * len_proj)
 
     def distance(self, other):
-        return (self.subtract(other)).modulus()
+        dx = self.x - other.x
+        dy = self.y - other.y
+        dz = self.z - other.z
+        return math.sqrt(dx * dx + dy * dy + dz * dz)
+
+
+class FrozenVector(Vector):
+    """Immutable, hashable Vector. Operations on it return FrozenVectors."""
+    __slots__ = ()
+
+    def __init__(self, x, y, z):
+        object.__setattr__(self, "x", float(x))
+        object.__setattr__(self, "y", float(y))
+        object.__setattr__(self, "z", float(z))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.z))
+
+    def __reduce__(self):
+        return self.__class__, (self.x, self.y, self.z)
 
 class Point:
+    __slots__ = ("x", "y", "z")
+
     def __init__(self, x, y, z):
         """Point is (x, y, z)"""
         self.x = x
@@ -86,6 +170,8 @@ class Point:
         return f"({self.x}, {self.y}, {self.z})"
 
 class Plane:
+    __slots__ = ("a", "b", "c", "d")
+
     def __init__(self, a, b, c, d):
         """
         Plane: ax + by + cz = d. Attributes are the coefficients.
@@ -104,12 +190,15 @@ class Plane:
 
     def on_plane(self, x, y, z):
         """
-        Checks whether a given point (x, y, z) lies on the plane and displays output
+        Checks whether a given point (x, y, z) lies on the plane, displays output
+        and returns the result
         """
         if self.a * x + self.b * y + self.c * z == self.d:
           print("Point lies on plane")
+          return True
         else:
           print("Point does not lie on plane")
+          return False
 
     def dist_from_origin(self):
         """
@@ -133,12 +222,46 @@ class Plane:
         dot_product = self.a * other_plane.a + self.b * other_plane.b + self.c * other_plane.c
         magnitude1 = math.sqrt(self.a ** 2 + self.b ** 2 + self.c ** 2)
         magnitude2 = math.sqrt(other_plane.a ** 2 + other_plane.b ** 2 + other_plane.c ** 2)
-        angle_rad = math.acos(dot_product / (magnitude1 * magnitude2))
+        # Clamp as in Vector.angle: parallel planes can give a cosine just outside [-1, 1]
+        cos_angle = max(-1.0, min(1.0, dot_product / (magnitude1 * magnitude2)))
+        angle_rad = math.acos(cos_angle)
         angle_deg = math.degrees(angle_rad)
         return round(min(angle_deg, 180 - angle_deg), 1)
 
-def process_vector_query(input_string):
-    output_data = {
+# Display messages for each operation. Positional fields are the input vectors,
+# "result" is the computed value and "scalar" the factor in scalar_multiplication.
+# Shared with the batch engine in batch_query.py so both paths print the same text.
+DISPLAY_FORMATS = {
+    "vector": "Vector: {0}",
+    "vectors": "Displaying input vectors.",
+    "magnitude": "Magnitude of {0} = {result:.3f}",
+    "unit_vector": "Unit vector of {0}: {result}",
+    "addition": "{0} + {1} = {result}",
+    "subtract": "{0} - {1} = {result}",
+    "dot_product": "{0} . {1} = {result:.3f}",
+    "cross_product": "{0} x {1} = {result}",
+    "angle": "Angle between {0} and {1}: {result:.2f}°",
+    "length_of_proj": "Length of projection of {0} onto {1}: {result:.3f}",
+    "projection_vector": "Projection of {0} onto {1}: {result}",
+    "distance": "Distance between points represented by {0} and {1}: {result:.3f}",
+    "scalar_multiplication": "{scalar} * {0} = {result}",
+}
+
+TWO_VECTOR_OPERATIONS = {
+    "addition": Vector.add,
+    "subtract": Vector.subtract,
+    "dot_product": Vector.dot_product,
+    "cross_product": Vector.cross_product,
+    "angle": Vector.angle,
+    "length_of_proj": Vector.length_of_proj,
+    "projection_vector": Vector.projection_vector,
+    "distance": Vector.distance,
+}
+
+
+def new_output_data():
+    """Returns an empty result dict in the shape process_vector_query produces."""
+    return {
         "input_vectors_coords": [], # Store original coords for plotting if needed
         "result_vector_coords": None, # Store result vector coords for plotting
         "scalar_result": None,
@@ -147,146 +270,197 @@ def process_vector_query(input_string):
         "error_message": None
     }
 
-    try:
-        parsed_input = ast.literal_eval(input_string)
-        if not isinstance(parsed_input, list) or len(parsed_input) < 1:
-            raise ValueError("Input must be a non-empty list.")
-
-        operation_label = None
-        raw_vector_data = []
 
-        if isinstance(parsed_input[-1], str):
-            operation_label = parsed_input[-1].lower()
+def set_error(output_data, error, input_string):
+    """Records an exception raised while processing input_string in output_data."""
+    if isinstance(error, ZeroDivisionError):
+        output_data["error_message"] = f"ZeroDivisionError: {error}. Input: '{input_string}'"
+    else:
+        output_data["error_message"] = f"Error processing input: {error}. Input: '{input_string}'"
+    output_data["display_message"] = output_data["error_message"]
+
+
+def parse_query(input_string, output_data):
+    """
+    Parses a query string and validates its vector data.
+
+    operation_name and input_vectors_coords are filled in on output_data as
+    parsing goes, so a query that fails part-way still reports what was read.
+
+    Returns:
+        (operation_label, raw_vector_data, components), where components holds
+        one [x, y, z] list of floats per vector.
+    """
+    parsed_input = parse_literal(input_string)
+    if not isinstance(parsed_input, list) or len(parsed_input) < 1:
+        raise ValueError("Input must be a non-empty list.")
+
+    operation_label = None
+    raw_vector_data = []
+
+    if isinstance(parsed_input[-1], str):
+        operation_label = parsed_input[-1].lower()
+        output_data["operation_name"] = operation_label
+        raw_vector_data = parsed_input[:-1]
+    else:
+        # This case handles if the AI returns only vector(s) without an operation string.
+        # Example: "[[1,2,3]]" or "[[1,2,3],[4,5,6]]"
+        # We'll treat this as a 'vectors' display operation.
+        if all(isinstance(item, list) for item in parsed_input):
+            operation_label = "vectors" # Default to displaying vectors
             output_data["operation_name"] = operation_label
-            raw_vector_data = parsed_input[:-1]
+            raw_vector_data = parsed_input
         else:
-            # This case handles if the AI returns only vector(s) without an operation string.
-            # Example: "[[1,2,3]]" or "[[1,2,3],[4,5,6]]"
-            # We'll treat this as a 'vectors' display operation.
-            if all(isinstance(item, list) for item in parsed_input):
-                operation_label = "vectors" # Default to displaying vectors
-                output_data["operation_name"] = operation_label
-                raw_vector_data = parsed_input
-            else:
-                raise ValueError("Operation must be a string and the last element, or input must be a list of vectors.")
+            raise ValueError("Operation must be a string and the last element, or input must be a list of vectors.")
+
+    components_list = output_data["input_vectors_coords"]
+    for v_data in raw_vector_data:
+        if not isinstance(v_data, list) or not (2 <= len(v_data) <= 3) : # Allow 2D or 3D vectors
+            # For operations like scalar multiplication: [[1,2,3], 2, 'scalar_multiplication']
+            if isinstance(v_data, (int, float)) and operation_label == "scalar_multiplication" and len(raw_vector_data) == 2:
+                # This element is the scalar, already handled if we parse it correctly
+                continue
+            raise ValueError(f"Invalid vector format or number of components: {v_data}")
+
+        components = [_to_float(comp) for comp in v_data]
+        if len(components) == 2: # Handle 2D vector by adding z=0
+            components.append(0.0)
+        components_list.append(components)
 
+    if not components_list and operation_label not in ["scalar_triple_product", "linear_combination", "vector_equation_unknown_lhs"]: # Some ops might have specific parsing
+        if not (operation_label == "scalar_multiplication" and len(raw_vector_data) == 2 and isinstance(raw_vector_data[1], (int,float))):
+            raise ValueError("No valid vector data found.")
 
-        vector_objs = []
-        for v_data in raw_vector_data:
-            if not isinstance(v_data, list) or not (2 <= len(v_data) <= 3) : # Allow 2D or 3D vectors
-                 # For operations like scalar multiplication: [[1,2,3], 2, 'scalar_multiplication']
-                if isinstance(v_data, (int, float)) and operation_label == "scalar_multiplication" and len(raw_vector_data) == 2:
-                    # This element is the scalar, already handled if we parse it correctly
-                    continue
-                raise ValueError(f"Invalid vector format or number of components: {v_data}")
-            
-            components = [float(comp) for comp in v_data]
-            if len(components) == 2: # Handle 2D vector by adding z=0
-                components.append(0.0)
-            vector_objs.append(Vector(*components))
-            output_data["input_vectors_coords"].append(components)
+    return operation_label, raw_vector_data, components_list
 
 
-        if not vector_objs and operation_label not in ["scalar_triple_product", "linear_combination", "vector_equation_unknown_lhs"]: # Some ops might have specific parsing
-             if not (operation_label == "scalar_multiplication" and len(raw_vector_data) == 2 and isinstance(raw_vector_data[1], (int,float))):
-                raise ValueError("No valid vector data found.")
+def scalar_multiplication_factor(raw_vector_data):
+    """Returns the scalar of a well-formed [[vec], scalar, 'scalar_multiplication'] query, else None."""
+    if len(raw_vector_data) == 2 and isinstance(raw_vector_data[0], list) and isinstance(raw_vector_data[1], (int, float)):
+        return _to_float(raw_vector_data[1])
+    return None
+
+
+def _to_float(number):
+    """float(number), raising ValueError rather than OverflowError for an integer beyond float range."""
+    try:
+        return float(number)
+    except OverflowError as e:
+        raise ValueError(e) from None
+
+
+def process_vector_query(input_string, cache=None, metrics=None, as_record=False):
+    """
+    Evaluates one query string such as "[[1,2,3],[4,5,6],'dot_product']".
+
+    Args:
+        input_string: The query, as produced by the AI.
+        cache: Optional QueryCache (see query_cache.py). Repeated queries are then
+            answered from the cache instead of being recomputed.
+        metrics: Optional QueryMetrics (see query_metrics.py) that records stage
+            timings, latency and errors. When None nothing is timed.
+        as_record: Return a QueryResult (see query_result.py) instead of a dict.
+            Its display_message is only formatted when first read, unless a
+            cache is given (cached entries are dicts, stored with their message).
+
+    Returns:
+        The output_data dict (or QueryResult) describing the result or the error.
+    """
+    output_data = new_output_data()
+    format_message = not as_record or cache is not None
+    scalar_val = None
+    # perf_counter() at the start and after each completed stage, only when instrumented
+    marks = [perf_counter()] if metrics is not None else None
+    error_type = None
+    cache_hit = False
+
+    try:
+        operation_label, raw_vector_data, components_list = parse_query(input_string, output_data)
+        scalar_val = scalar_multiplication_factor(raw_vector_data) if operation_label == "scalar_multiplication" else None
+        if marks is not None:
+            marks.append(perf_counter())
+
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.key(operation_label, components_list, scalar_val)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                cache_hit = True
+                return _to_record(cached) if as_record else cached
+
+        vector_objs = [Vector(*components) for components in components_list]
+        if marks is not None:
+            marks.append(perf_counter())
 
         # --- Handle operations ---
-        result = None # To store the computational result
-        
-        if operation_label == "vector":
-            if len(vector_objs) == 1:
-                v1 = vector_objs[0]
-                output_data["result_vector_coords"] = [v1.x, v1.y, v1.z]
-                output_data["display_message"] = f"Vector: {v1}"
+        result = None # Either a Vector or a scalar
+
+        if operation_label in ["vector", "magnitude", "unit_vector"]:
+            if len(vector_objs) != 1:
+                raise ValueError(f"Operation '{operation_label}' expects 1 vector.")
+            v1 = vector_objs[0]
+            if operation_label == "vector":
+                result = v1
+            elif operation_label == "magnitude":
+                result = v1.modulus()
             else:
-                raise ValueError("Operation 'vector' expects 1 vector.")
-        
+                result = v1.unit_vector()
+
         elif operation_label == "vectors":
             # For just displaying multiple vectors, no specific 'result' vector beyond the inputs
-            output_data["display_message"] = "Displaying input vectors."
-            # input_vectors_coords already populated
+            pass
 
-        elif operation_label == "magnitude":
-            if len(vector_objs) == 1:
-                v1 = vector_objs[0]
-                result = v1.modulus()
-                output_data["scalar_result"] = result
-                output_data["display_message"] = f"Magnitude of {v1} = {result:.3f}"
-            else:
-                raise ValueError("Operation 'magnitude' expects 1 vector.")
-
-        elif operation_label == "unit_vector": # Corrected from 'unitvector' for consistency
-            if len(vector_objs) == 1:
-                v1 = vector_objs[0]
-                result_vec = v1.unit_vector()
-                output_data["result_vector_coords"] = [result_vec.x, result_vec.y, result_vec.z]
-                output_data["display_message"] = f"Unit vector of {v1}: {result_vec}"
-            else:
-                raise ValueError("Operation 'unit_vector' expects 1 vector.")
-        
         # Two-vector operations
-        elif operation_label in ["addition", "subtract", "dot_product", "cross_product", "angle", "length_of_proj", "projection_vector", "distance"]:
-            if len(vector_objs) == 2:
-                v1, v2 = vector_objs
-                if operation_label == "addition":
-                    result_vec = v1.add(v2)
-                    output_data["result_vector_coords"] = [result_vec.x, result_vec.y, result_vec.z]
-                    output_data["display_message"] = f"{v1} + {v2} = {result_vec}"
-                elif operation_label == "subtract": # Note: your old process_vector_query had 'subtract' not 'subtraction'
-                    result_vec = v1.subtract(v2)
-                    output_data["result_vector_coords"] = [result_vec.x, result_vec.y, result_vec.z]
-                    output_data["display_message"] = f"{v1} - {v2} = {result_vec}"
-                elif operation_label == "dot_product": # Note: your old process_vector_query had 'dot product'
-                    result = v1.dot_product(v2)
-                    output_data["scalar_result"] = result
-                    output_data["display_message"] = f"{v1} . {v2} = {result:.3f}"
-                elif operation_label == "cross_product":# Note: your old process_vector_query had 'cross product'
-                    result_vec = v1.cross_product(v2)
-                    output_data["result_vector_coords"] = [result_vec.x, result_vec.y, result_vec.z]
-                    output_data["display_message"] = f"{v1} x {v2} = {result_vec}"
-                elif operation_label == "angle":
-                    result = v1.angle(v2) # result in radians
-                    output_data["scalar_result"] = math.degrees(result) # convert to degrees for display
-                    output_data["display_message"] = f"Angle between {v1} and {v2}: {output_data['scalar_result']:.2f}°"
-                elif operation_label == "length_of_proj": # Note: your old process_vector_query had 'length of projection'
-                    result = v1.length_of_proj(v2)
-                    output_data["scalar_result"] = result
-                    output_data["display_message"] = f"Length of projection of {v1} onto {v2}: {result:.3f}"
-                elif operation_label == "projection_vector": # Note: your old process_vector_query had 'projection vector'
-                    result_vec = v1.projection_vector(v2)
-                    output_data["result_vector_coords"] = [result_vec.x, result_vec.y, result_vec.z]
-                    output_data["display_message"] = f"Projection of {v1} onto {v2}: {result_vec}"
-                elif operation_label == "distance":
-                    result = v1.distance(v2)
-                    output_data["scalar_result"] = result
-                    output_data["display_message"] = f"Distance between points represented by {v1} and {v2}: {result:.3f}"
-            else:
+        elif operation_label in TWO_VECTOR_OPERATIONS:
+            if len(vector_objs) != 2:
                 raise ValueError(f"Operation '{operation_label}' expects 2 vectors.")
-        
+            v1, v2 = vector_objs
+            result = TWO_VECTOR_OPERATIONS[operation_label](v1, v2)
+            if operation_label == "angle":
+                result = math.degrees(result) # result in radians, convert to degrees for display
+
         # Handling scalar multiplication: e.g., [[1,2,3], 2, 'scalar_multiplication']
         elif operation_label == "scalar_multiplication":
-            if len(raw_vector_data) == 2 and isinstance(raw_vector_data[0], list) and isinstance(raw_vector_data[1], (int, float)):
-                scalar_val = float(raw_vector_data[1])
-                v1 = vector_objs[0] # vector_objs should contain the first element if it was a list
-                output_data["input_vectors_coords"] = [[v1.x, v1.y, v1.z]] # ensure input_vectors_coords is set
-                result_vec = v1.multiply(scalar_val)
-                output_data["result_vector_coords"] = [result_vec.x, result_vec.y, result_vec.z]
-                output_data["display_message"] = f"{scalar_val} * {v1} = {result_vec}"
-            else:
+            if scalar_val is None:
                 raise ValueError("Invalid format for 'scalar_multiplication'. Expected [[vec], scalar, 'op'] or [scalar, [vec], 'op']")
-
+            result = vector_objs[0].multiply(scalar_val)
 
         else: # Fallback for operations not explicitly handled above by name
             output_data["error_message"] = f"Unsupported or unknown operation: '{operation_label}'"
             output_data["display_message"] = output_data["error_message"]
+            error_type = "UnsupportedOperation"
             # No result vector or scalar to set
+            return _to_record(output_data) if as_record else output_data
+
+        if marks is not None:
+            marks.append(perf_counter())
+        if isinstance(result, Vector):
+            output_data["result_vector_coords"] = [result.x, result.y, result.z]
+        elif result is not None:
+            output_data["scalar_result"] = result
+        if format_message:
+            output_data["display_message"] = DISPLAY_FORMATS[operation_label].format(
+                *vector_objs, result=result, scalar=scalar_val)
+        else:
+            # Not formatted here: the record renders it from the same fields when first read
+            output_data["display_message"] = None
+
+        if cache_key is not None:
+            cache.put(cache_key, output_data)
+        if marks is not None:
+            marks.append(perf_counter())
+
+    except (ValueError, SyntaxError, TypeError, ZeroDivisionError) as e:
+        set_error(output_data, e, input_string)
+        error_type = type(e).__name__
+    finally:
+        if marks is not None:
+            metrics.record(output_data["operation_name"], marks, error_type, cache_hit)
+
+    return _to_record(output_data, scalar_val) if as_record else output_data
+
 
-    except (ValueError, SyntaxError, TypeError) as e:
-        output_data["error_message"] = f"Error processing input: {e}. Input: '{input_string}'"
-        output_data["display_message"] = output_data["error_message"]
-    except ZeroDivisionError as z:
-        output_data["error_message"] = f"ZeroDivisionError: {z}. Input: '{input_string}'"
-        output_data["display_message"] = output_data["error_message"]
-    
-    return output_data
+def _to_record(output_data, scalar_factor=None):
+    """Returns output_data as a QueryResult; a display_message of None is rendered when first read."""
+    from query_result import QueryResult # query_result imports this module
+    return QueryResult.from_dict(output_data, scalar_factor)
@@ -1,21 +1,61 @@
-processed_outputs = [] # Renamed from processed_results to avoid confusion
-print("--- Processing AI Results for Plotting ---")
-for ai_result_string in results: # Assuming 'results' is the list of AI output strings
-    print(f"\nInput string from AI: {ai_result_string}")
-    data_for_plot = process_vector_query(ai_result_string)
-    processed_outputs.append(data_for_plot)
-    
-    # You can print the dictionary to see what process_vector_query returned:
-    # import json
-    # print(f"Processed data: {json.dumps(data_for_plot, indent=2, default=str)}") # Using json for pretty print
-
-    if data_for_plot.get("error_message"):
-        print(f"  Error encountered: {data_for_plot['error_message']}")
-        # Optionally, still try to plot if there are input vectors, or skip plotting
-        # For now, the plotting function will display the error as title
-        plot_vector_data(data_for_plot)
+import matplotlib.pyplot as plt
+
+from batch_query import process_vector_queries
+
+
+def plot_vector_data(data_for_plot, output_path=None):
+    """
+    Draws the input vectors (blue) and the result vector (red) of one
+    process_vector_query result from the origin, titled with its display message.
+
+    Args:
+        data_for_plot: An output_data dict.
+        output_path: If given, the figure is saved there instead of being shown.
+    """
+    fig = plt.figure(figsize=(6, 6))
+    ax = fig.add_subplot(projection="3d")
+    vectors = [(coords, "tab:blue") for coords in data_for_plot["input_vectors_coords"]]
+    if data_for_plot["result_vector_coords"] is not None:
+        vectors.append((data_for_plot["result_vector_coords"], "tab:red"))
+
+    limit = max([abs(c) for coords, _ in vectors for c in coords] + [1.0])
+    for (x, y, z), color in vectors:
+        ax.quiver(0, 0, 0, x, y, z, color=color, arrow_length_ratio=0.1)
+    ax.set_xlim(-limit, limit)
+    ax.set_ylim(-limit, limit)
+    ax.set_zlim(-limit, limit)
+    ax.set_xlabel("x")
+    ax.set_ylabel("y")
+    ax.set_zlabel("z")
+    ax.set_title(data_for_plot["display_message"], fontsize=9)
+
+    if output_path is None:
+        plt.show()
     else:
-        print(f"  Operation: {data_for_plot['operation_name']}")
-        print(f"  Display Message: {data_for_plot['display_message']}")
-        plot_vector_data(data_for_plot)
-    print("-" * 30)
+        fig.savefig(output_path)
+    plt.close(fig)
+
+
+def plot_results(results):
+    """Processes and plots each AI output string in results, printing a summary of each."""
+    print("--- Processing AI Results for Plotting ---")
+    # Evaluate the whole batch at once; results come back in the same order as 'results'
+    processed_outputs = process_vector_queries(results) # 'results' is the list of AI output strings
+    for ai_result_string, data_for_plot in zip(results, processed_outputs):
+        print(f"\nInput string from AI: {ai_result_string}")
+
+        # You can print the dictionary to see what process_vector_query returned:
+        # import json
+        # print(f"Processed data: {json.dumps(data_for_plot, indent=2, default=str)}") # Using json for pretty print
+
+        if data_for_plot.get("error_message"):
+            print(f"  Error encountered: {data_for_plot['error_message']}")
+            # Optionally, still try to plot if there are input vectors, or skip plotting
+            # For now, the plotting function will display the error as title
+            plot_vector_data(data_for_plot)
+        else:
+            print(f"  Operation: {data_for_plot['operation_name']}")
+            print(f"  Display Message: {data_for_plot['display_message']}")
+            plot_vector_data(data_for_plot)
+        print("-" * 30)
+    return processed_outputs
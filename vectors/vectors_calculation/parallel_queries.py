@@ -0,0 +1,61 @@
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_query import process_vector_queries
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def _chunks(iterable, chunk_size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_results_parallel(input_strings, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields the output_data dict of each query in input_strings, in input order,
+    evaluating chunks of chunk_size queries across a pool of worker processes.
+
+    Only query strings go to the workers and only plain dicts of floats and
+    strings come back, so nothing but builtin types crosses the process boundary.
+    At most two chunks per worker are in flight at a time, so input_strings
+    may be an arbitrarily long iterator.
+
+    Args:
+        input_strings: Iterable of query strings.
+        workers: Number of worker processes. Defaults to os.cpu_count(). With one
+            worker everything runs in the calling process, with no pool at all.
+        chunk_size: Queries sent to a worker per task.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(input_strings, chunk_size)
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from process_vector_queries(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(process_vector_queries, chunk)
+                        for chunk in itertools.islice(chunks, 2 * workers))
+        while pending:
+            results = pending.popleft().result()
+            for chunk in itertools.islice(chunks, 1):
+                pending.append(pool.submit(process_vector_queries, chunk))
+            yield from results
+
+
+def process_vector_queries_parallel(input_strings, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Parallel version of process_vector_queries: returns one output_data dict per
+    query, in input order. See iter_results_parallel for the arguments.
+    """
+    return list(iter_results_parallel(input_strings, workers, chunk_size))
@@ -0,0 +1,81 @@
+import numpy as np
+
+from calc import Plane
+from vector_array import as_coordinate_array
+
+
+class PlaneSet:
+    """
+    A batch of planes ax + by + cz = d, stored as a (K, 4) float64 array of
+    coefficients, for classifying many points against many planes at once.
+
+    Unit normals and offsets are computed once on construction. Planes whose
+    normal is the zero vector are flagged in `degenerate`; their distances and
+    angles are NaN rather than raising, so one bad plane doesn't abort a batch.
+    """
+
+    def __init__(self, coefficients):
+        """Constructor. coefficients is anything np.asarray can turn into (K, 4)."""
+        coefficients = np.asarray(coefficients, dtype=np.float64).reshape(-1, 4)
+        self.coefficients = coefficients
+        normals = coefficients[:, :3]
+        a, b, c = normals.T
+        self.norms = np.sqrt(a * a + b * b + c * c)
+        self.degenerate = self.norms == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.unit_normals = normals / self.norms[:, np.newaxis]
+            self.offsets = coefficients[:, 3] / self.norms
+
+    @classmethod
+    def from_planes(cls, planes):
+        """Builds a PlaneSet from an iterable of Plane objects."""
+        return cls([(p.a, p.b, p.c, p.d) for p in planes])
+
+    def to_planes(self):
+        """Returns the planes as a list of Plane objects."""
+        return [Plane(a, b, c, d) for a, b, c, d in self.coefficients.tolist()]
+
+    def __len__(self):
+        return len(self.coefficients)
+
+    def __getitem__(self, index):
+        return PlaneSet(self.coefficients[index])
+
+    def signed_distances(self, points):
+        """
+        Returns an (M, K) matrix of signed distances from M points to the K planes,
+        positive on the side the normal points to.
+
+        Args:
+            points: (M, 3) array, nested list, or sequence of Point/Vector objects.
+        """
+        points = as_coordinate_array(points)
+        return points @ self.unit_normals.T - self.offsets
+
+    def distances(self, points):
+        """Returns an (M, K) matrix of distances from M points to the K planes (Plane.dist_from_pt)."""
+        return np.abs(self.signed_distances(points))
+
+    def on_plane(self, points, tol=1e-9):
+        """
+        Returns an (M, K) boolean mask, True where a point is within tol of a plane.
+        Unlike Plane.on_plane this tolerates floating point error and prints nothing.
+        """
+        with np.errstate(invalid="ignore"):
+            return self.distances(points) <= tol
+
+    def angles(self, other=None, decimals=1):
+        """
+        Returns the acute angles in degrees between every plane in this set and
+        every plane in other (this set if omitted), as a (K, L) matrix.
+
+        Args:
+            other: Another PlaneSet, or None for all pairwise angles within this set.
+            decimals: Rounding applied to the result, as in Plane.angle_plane.
+                None leaves the angles unrounded.
+        """
+        other = self if other is None else other
+        cos_angle = np.clip(self.unit_normals @ other.unit_normals.T, -1.0, 1.0)
+        angle_deg = np.degrees(np.arccos(cos_angle))
+        angle_deg = np.minimum(angle_deg, 180 - angle_deg)
+        return angle_deg if decimals is None else np.round(angle_deg, decimals)
@@ -0,0 +1,100 @@
+import math
+import threading
+from collections import OrderedDict
+
+
+def copy_output_data(output_data):
+    """Returns a copy of an output_data dict that shares no mutable state with it."""
+    result_coords = output_data["result_vector_coords"]
+    return {
+        **output_data,
+        "input_vectors_coords": [list(components) for components in output_data["input_vectors_coords"]],
+        "result_vector_coords": list(result_coords) if result_coords is not None else None,
+    }
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of process_vector_query results.
+
+    Entries are keyed on the parsed query rather than the raw string, so
+    "[[1,0,0],[0,1,0],'cross_product']" and "[[1, 0, 0], [0, 1, 0], 'Cross_Product']"
+    share one entry. Only successful results are cached, because error messages
+    quote the original input string.
+
+    Usage:
+        cache = QueryCache(maxsize=4096)
+        output_data = process_vector_query(input_string, cache=cache)
+        cache.stats()
+    """
+
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(operation_label, components_list, scalar=None):
+        """
+        Returns the cache key for a parsed query.
+
+        Args:
+            operation_label: The lower-cased operation label.
+            components_list: One [x, y, z] list of floats per input vector.
+            scalar: The factor of a scalar multiplication, if any.
+        """
+        values = tuple(c for components in components_list for c in components)
+        if scalar is not None:
+            values += (scalar,)
+        if 0.0 in values:
+            # -0.0 == 0.0, but they print differently, so keep the signs in the key
+            return operation_label, values, tuple(math.copysign(1.0, v) for v in values)
+        return operation_label, values
+
+    def get(self, key):
+        """Returns a copy of the cached result for key, or None on a miss."""
+        with self._lock:
+            output_data = self._entries.get(key)
+            if output_data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy_output_data(output_data)
+
+    def put(self, key, output_data):
+        """Stores a copy of output_data under key, evicting the least recently used entry if full."""
+        output_data = copy_output_data(output_data)
+        with self._lock:
+            self._entries[key] = output_data
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Removes all entries and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Returns the cache counters as a dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
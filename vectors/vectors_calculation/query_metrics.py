@@ -0,0 +1,155 @@
+import bisect
+import threading
+from time import perf_counter
+
+from calc import DISPLAY_FORMATS
+
+# Stages of process_vector_query, in order. A query that fails or is answered
+# from the cache part-way only records the stages it completed.
+STAGES = ("parse", "build", "compute", "format")
+
+# Upper bounds (seconds) of the per-operation latency histogram buckets; a
+# final +Inf bucket is implied.
+DEFAULT_BUCKETS = (5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 1e-2)
+
+# Operation labels are AI output, so any label outside this set is counted as
+# "other" to keep the number of distinct metric labels bounded.
+KNOWN_OPERATIONS = frozenset(DISPLAY_FORMATS) | {"unknown"}
+
+# Layout of the per-operation counter rows
+_OK, _CACHE_HIT, _ERROR, _LATENCY_SUM, _FIRST_BUCKET = range(5)
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class QueryMetrics:
+    """
+    Counters and latency histograms for process_vector_query.
+
+    Records, per operation label, how many queries succeeded, were answered
+    from the cache or failed, with a histogram of their total latency; the
+    time spent in each stage (parse, build, compute, format); and error counts
+    by exception type ("UnsupportedOperation" for unknown operation labels).
+
+    Pass an instance as process_vector_query(..., metrics=metrics); with the
+    default metrics=None nothing is timed or recorded.
+
+    Usage:
+        metrics = QueryMetrics()
+        output_data = process_vector_query(input_string, metrics=metrics)
+        metrics.snapshot()           # plain dict
+        metrics.prometheus_text()    # Prometheus text exposition format
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clears every counter."""
+        with self._lock:
+            # operation -> [ok, cache_hit, error, latency_sum, count per bucket..., +Inf count]
+            self._operations = {}
+            self._stage_counts = [0] * len(STAGES)
+            self._stage_sums = [0.0] * len(STAGES)
+            self._errors = {}  # exception type name -> count
+
+    def record(self, operation, marks, error_type=None, cache_hit=False):
+        """
+        Records one query.
+
+        Args:
+            operation: The query's operation label.
+            marks: perf_counter() readings taken at the start of the query and
+                after each completed stage, in STAGES order.
+            error_type: Exception type name if the query failed, else None.
+            cache_hit: Whether the result came from the cache.
+        """
+        total = perf_counter() - marks[0]
+        if operation not in KNOWN_OPERATIONS:
+            operation = "other"
+        outcome = _ERROR if error_type is not None else _CACHE_HIT if cache_hit else _OK
+        bucket = _FIRST_BUCKET + bisect.bisect_left(self.buckets, total)
+
+        with self._lock:
+            row = self._operations.get(operation)
+            if row is None:
+                row = self._operations[operation] = [0, 0, 0, 0.0] + [0] * (len(self.buckets) + 1)
+            row[outcome] += 1
+            row[_LATENCY_SUM] += total
+            row[bucket] += 1
+            for stage in range(len(marks) - 1):
+                self._stage_counts[stage] += 1
+                self._stage_sums[stage] += marks[stage + 1] - marks[stage]
+            if error_type is not None:
+                self._errors[error_type] = self._errors.get(error_type, 0) + 1
+
+    def snapshot(self):
+        """
+        Returns the current counters as a dict:
+            queries: total queries recorded
+            operations: {operation: {ok, cache_hit, error, latency_seconds_sum,
+                         latency_buckets: [(upper_bound, cumulative_count), ...]}}
+            stages: {stage: {count, seconds_sum, mean_seconds}}
+            errors: {exception type name: count}
+        """
+        with self._lock:
+            operations = {}
+            for operation, row in self._operations.items():
+                cumulative, total = [], 0
+                for bound, count in zip(self.buckets + (float("inf"),), row[_FIRST_BUCKET:]):
+                    total += count
+                    cumulative.append((bound, total))
+                operations[operation] = {
+                    "ok": row[_OK],
+                    "cache_hit": row[_CACHE_HIT],
+                    "error": row[_ERROR],
+                    "latency_seconds_sum": row[_LATENCY_SUM],
+                    "latency_buckets": cumulative,
+                }
+            stages = {stage: {"count": count,
+                              "seconds_sum": seconds,
+                              "mean_seconds": seconds / count if count else 0.0}
+                      for stage, count, seconds in zip(STAGES, self._stage_counts, self._stage_sums)}
+            return {
+                "queries": sum(data["latency_buckets"][-1][1] for data in operations.values()),
+                "operations": operations,
+                "stages": stages,
+                "errors": dict(self._errors),
+            }
+
+    def prometheus_text(self, prefix="vector_query"):
+        """Returns the counters in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_total Vector queries processed, by operation and outcome.",
+            f"# TYPE {prefix}_total counter",
+        ]
+        for operation, data in sorted(snapshot["operations"].items()):
+            for outcome in ("ok", "cache_hit", "error"):
+                lines.append(f'{prefix}_total{{operation="{_escape_label(operation)}",outcome="{outcome}"}} {data[outcome]}')
+
+        lines += [f"# HELP {prefix}_duration_seconds Total processing time per query.",
+                  f"# TYPE {prefix}_duration_seconds histogram"]
+        for operation, data in sorted(snapshot["operations"].items()):
+            label = f'operation="{_escape_label(operation)}"'
+            for bound, count in data["latency_buckets"]:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{prefix}_duration_seconds_bucket{{{label},le="{le}"}} {count}')
+            lines.append(f"{prefix}_duration_seconds_sum{{{label}}} {data['latency_seconds_sum']!r}")
+            lines.append(f"{prefix}_duration_seconds_count{{{label}}} {data['latency_buckets'][-1][1]}")
+
+        lines += [f"# HELP {prefix}_stage_seconds Time spent in each processing stage.",
+                  f"# TYPE {prefix}_stage_seconds summary"]
+        for stage, data in snapshot["stages"].items():
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {data["seconds_sum"]!r}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {data["count"]}')
+
+        lines += [f"# HELP {prefix}_errors_total Failed queries by exception type.",
+                  f"# TYPE {prefix}_errors_total counter"]
+        for error_type, count in sorted(snapshot["errors"].items()):
+            lines.append(f'{prefix}_errors_total{{error_type="{_escape_label(error_type)}"}} {count}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,60 @@
+import ast
+import json
+import re
+
+# Queries longer than this are rejected before any parsing is attempted.
+MAX_QUERY_LENGTH = 10_000
+
+# The query grammar process_vector_query accepts in practice: a list of numbers,
+# single-quoted strings and flat lists of numbers, e.g. "[[1,2,3],[4,5,6],'dot_product']".
+# Numbers are restricted to JSON syntax and strings to characters that need no
+# escaping, so a match can be handed to json.loads and still give exactly what
+# ast.literal_eval would.
+_WS = r"[ \t]*"
+_NUMBER = r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?"
+_STRING = r"'[^'\"\\\x00-\x1f]*'"
+_VECTOR = rf"\[{_WS}(?:{_NUMBER}{_WS}(?:,{_WS}{_NUMBER}{_WS})*)?\]"
+_ITEM = rf"(?:{_VECTOR}|{_NUMBER}|{_STRING})"
+_QUERY = re.compile(rf"{_WS}\[{_WS}(?:{_ITEM}{_WS}(?:,{_WS}{_ITEM}{_WS})*)?\]{_WS}")
+_DECODER = json.JSONDecoder()
+
+# The shape of almost every query: one or more 2D/3D vectors of plain numbers,
+# an optional scalar and an operation string. The batch engine (batch_query.py)
+# deletes NUMBER_CHARACTERS from each query, so that queries differing only in
+# their numbers share a signature such as "[[, , ], [, ], 'dot_product']", and
+# matches QUERY_SIGNATURE once per distinct signature. Groups: the vectors, the
+# scalar (None if absent) and the tail from the operation string's opening
+# quote to the end. A signature says nothing about the numbers themselves;
+# they are checked when the batch engine converts them.
+NUMBER_CHARACTERS = str.maketrans("", "", "0123456789.+-")
+_SLOT = r"[ \t]*[eE]?[ \t]*"
+_SIGNATURE_VECTOR = rf"\[{_SLOT},{_SLOT}(?:,{_SLOT})?\]"
+QUERY_SIGNATURE = re.compile(rf"{_WS}\[{_WS}({_SIGNATURE_VECTOR}{_WS}(?:,{_WS}{_SIGNATURE_VECTOR}{_WS})*)"
+                             rf"(?:,({_SLOT}))?,{_WS}('[^'\"\\\x00-\x1f]*'{_WS}\]{_WS})")
+
+
+def parse_literal(input_string, max_length=MAX_QUERY_LENGTH):
+    """
+    Parses a query string into the same Python object ast.literal_eval returns.
+
+    Strings matching the query grammar are converted with json.loads, which is
+    much cheaper than building an AST. Anything else (trailing commas, 1., +1,
+    escaped strings, other literals, malformed input) goes to ast.literal_eval,
+    so accepted inputs, results and error messages are unchanged.
+
+    Args:
+        input_string: The query string.
+        max_length: Strings longer than this raise ValueError without being parsed.
+
+    Returns:
+        The parsed Python literal.
+    """
+    if isinstance(input_string, str):
+        if len(input_string) > max_length:
+            raise ValueError(f"Input exceeds the maximum length of {max_length} characters.")
+        if _QUERY.fullmatch(input_string):
+            try:
+                return _DECODER.decode(input_string.replace("'", '"'))
+            except ValueError: # e.g. integers beyond int()'s digit limit
+                pass
+    return ast.literal_eval(input_string)
@@ -0,0 +1,90 @@
+from calc import DISPLAY_FORMATS
+
+
+def vector_string(coords):
+    """Formats (x, y, z) the way Vector.__str__ does."""
+    x, y, z = coords
+    return f"({x:.2f}, {y:.2f}, {z:.2f})"
+
+
+class QueryResult:
+    """
+    Compact result of one vector query.
+
+    Holds the same information as an output_data dict, but coordinates are
+    tuples of floats and display_message is only formatted when it is first
+    read, so batch jobs that only use the numbers never pay for the strings.
+    to_dict() returns the output_data dict shape for existing consumers.
+    """
+    __slots__ = ("operation_name", "input_vectors_coords", "result_vector_coords", "scalar_result",
+                 "error_message", "scalar_factor", "_display_message")
+
+    def __init__(self, operation_name, input_vectors_coords=(), result_vector_coords=None,
+                 scalar_result=None, error_message=None, scalar_factor=None, display_message=None):
+        """
+        Args:
+            operation_name: The operation label ("unknown" if it was never parsed).
+            input_vectors_coords: One (x, y, z) tuple of floats per input vector.
+            result_vector_coords: (x, y, z) of the result vector, if any.
+            scalar_result: The scalar result, if any.
+            error_message: Why the query failed, if it did.
+            scalar_factor: The factor of a scalar_multiplication, used in its message.
+            display_message: An already formatted message; rendered lazily if None.
+        """
+        self.operation_name = operation_name
+        self.input_vectors_coords = input_vectors_coords
+        self.result_vector_coords = result_vector_coords
+        self.scalar_result = scalar_result
+        self.error_message = error_message
+        self.scalar_factor = scalar_factor
+        self._display_message = display_message
+
+    @classmethod
+    def from_dict(cls, output_data, scalar_factor=None):
+        """
+        Builds a QueryResult from a process_vector_query output_data dict. A
+        display_message of None is rendered lazily (scalar_factor is then
+        needed for scalar_multiplication).
+        """
+        result_coords = output_data["result_vector_coords"]
+        return cls(output_data["operation_name"],
+                   tuple(map(tuple, output_data["input_vectors_coords"])),
+                   tuple(result_coords) if result_coords is not None else None,
+                   output_data["scalar_result"], output_data["error_message"],
+                   scalar_factor, output_data["display_message"])
+
+    @property
+    def display_message(self):
+        if self._display_message is None:
+            self._display_message = self._render_message()
+        return self._display_message
+
+    def _render_message(self):
+        if self.error_message is not None:
+            return self.error_message
+        message_format = DISPLAY_FORMATS.get(self.operation_name)
+        if message_format is None:
+            return ""
+        if self.result_vector_coords is not None:
+            result = vector_string(self.result_vector_coords)
+        else:
+            result = self.scalar_result
+        return message_format.format(*map(vector_string, self.input_vectors_coords),
+                                     result=result, scalar=self.scalar_factor)
+
+    def to_dict(self):
+        """Returns the result as an output_data dict, as process_vector_query produces."""
+        result_coords = self.result_vector_coords
+        return {
+            "input_vectors_coords": [list(coords) for coords in self.input_vectors_coords],
+            "result_vector_coords": list(result_coords) if result_coords is not None else None,
+            "scalar_result": self.scalar_result,
+            "operation_name": self.operation_name,
+            "display_message": self.display_message,
+            "error_message": self.error_message,
+        }
+
+    def __repr__(self):
+        return (f"{type(self).__name__}({self.operation_name!r}, {self.input_vectors_coords!r}, "
+                f"result_vector_coords={self.result_vector_coords!r}, scalar_result={self.scalar_result!r}, "
+                f"error_message={self.error_message!r})")
@@ -0,0 +1,184 @@
+import asyncio
+
+from batch_query import process_vector_queries
+
+DEFAULT_BATCH_WINDOW = 0.002  # seconds
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_QUEUE_DEPTH = 10_000
+
+_STOP = object()  # Queue sentinel telling the batching task to finish
+
+
+class VectorQueryService:
+    """
+    Asyncio front-end that evaluates concurrently submitted queries in micro-batches.
+
+    Queries submitted within batch_window seconds of the first query of a batch
+    (or until max_batch_size queries have arrived) are evaluated together with
+    process_vector_queries, and each caller gets its own output_data dict.
+    At most max_queue_depth queries wait at a time: beyond that, submit()
+    waits for room (backpressure) and submit_nowait() raises asyncio.QueueFull.
+
+    Batches are evaluated on the event loop by default, which is fastest for
+    the small batches a tutoring UI produces. Pass an executor (e.g. a
+    ProcessPoolExecutor) to keep the loop responsive under heavy load.
+
+    Usage:
+        async with VectorQueryService() as service:
+            output_data = await service.submit("[[1,2,3],[4,5,6],'dot_product']")
+    """
+
+    def __init__(self, batch_window=DEFAULT_BATCH_WINDOW, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_queue_depth=DEFAULT_MAX_QUEUE_DEPTH, executor=None):
+        if batch_window < 0:
+            raise ValueError("batch_window must not be negative.")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        if max_queue_depth < 1:
+            raise ValueError("max_queue_depth must be at least 1.")
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.max_queue_depth = max_queue_depth
+        self.executor = executor
+        self.batches = 0
+        self.queries = 0
+        self.largest_batch = 0
+        self._queue = None
+        self._wake = None
+        self._wanted = 0
+        self._worker = None
+        self._stopping = False
+
+    async def start(self):
+        """Starts the batching task on the running event loop."""
+        if self._worker is not None:
+            raise RuntimeError("The service is already running.")
+        self._queue = asyncio.Queue(self.max_queue_depth)
+        self._wake = asyncio.Event()
+        self._wanted = 0  # Queued queries that would fill the batch being collected
+        self._stopping = False
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops accepting queries, evaluates every query already submitted, then stops."""
+        if self._worker is None:
+            return
+        self._stopping = True
+        await self._queue.put(_STOP)
+        self._wake.set()
+        await self._worker
+        self._worker = None
+        # Submitters that were waiting for room when stop() was called queued behind the sentinel
+        while not self._queue.empty():
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("The service was stopped."))
+            await asyncio.sleep(0)  # Let any still-blocked put() calls complete
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.stop()
+
+    def _check_running(self):
+        if self._worker is None or self._stopping:
+            raise RuntimeError("The service is not running.")
+
+    def _notify(self):
+        if self._wanted and self._queue.qsize() >= self._wanted:
+            self._wake.set()
+
+    async def submit(self, input_string):
+        """Evaluates one query and returns its output_data dict, waiting if the queue is full."""
+        self._check_running()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((input_string, future))
+        self._notify()
+        return await future
+
+    def submit_nowait(self, input_string):
+        """
+        Queues one query without waiting and returns a future for its output_data.
+        Raises asyncio.QueueFull if max_queue_depth queries are already waiting.
+        """
+        self._check_running()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((input_string, future))
+        self._notify()
+        return future
+
+    async def submit_many(self, input_strings):
+        """Submits every query concurrently and returns their output_data dicts in order."""
+        return await asyncio.gather(*(self.submit(input_string) for input_string in input_strings))
+
+    def stats(self):
+        """Returns the batching counters as a dict."""
+        return {
+            "queries": self.queries,
+            "batches": self.batches,
+            "mean_batch_size": self.queries / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+    async def _next_batch(self):
+        """Waits for a query, then collects more until the window closes or the batch is full."""
+        item = await self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_window
+        while True:
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is _STOP:
+                    return batch, True
+                batch.append(item)
+            remaining = deadline - loop.time()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                return batch, False
+            # Sleep until the window closes, or until submit() sees enough queries to fill the batch
+            self._wanted = self.max_batch_size - len(batch)
+            self._wake.clear()
+            timer = loop.call_later(remaining, self._wake.set)
+            await self._wake.wait()
+            timer.cancel()
+            self._wanted = 0
+
+    async def _evaluate(self, batch):
+        input_strings = [input_string for input_string, _ in batch]
+        try:
+            if self.executor is None:
+                results = process_vector_queries(input_strings)
+            else:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, process_vector_queries, input_strings)
+        except Exception as e:
+            if len(batch) > 1:
+                # Retry one query at a time, so only the callers whose queries fail get the exception
+                for item in batch:
+                    await self._evaluate([item])
+                return
+            _, future = batch[0]
+            if not future.done():  # Fail this caller, but keep serving
+                future.set_exception(e)
+            return
+        for (_, future), output_data in zip(batch, results):
+            if not future.done():  # The caller may have been cancelled meanwhile
+                future.set_result(output_data)
+
+    async def _run(self):
+        while True:
+            batch, stop = await self._next_batch()
+            batch = [(input_string, future) for input_string, future in batch if not future.cancelled()]
+            if batch:
+                self.batches += 1
+                self.queries += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+                await self._evaluate(batch)
+            if stop:
+                return
@@ -0,0 +1,224 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+from calc import Point, Vector
+from plane_set import PlaneSet
+from vector_array import as_coordinate_array
+
+DEFAULT_REBUILD_THRESHOLD = 4096
+# Queries x buffered points up to which the buffer is searched by brute force
+# rather than through a KD-tree built for it
+_BRUTE_FORCE_LIMIT = 1 << 16
+
+
+def _query_array(points):
+    """as_coordinate_array, also accepting a single Point/Vector or coordinate triple."""
+    if isinstance(points, (Point, Vector)):
+        points = [points]
+    return as_coordinate_array(points)
+
+
+class PointIndex:
+    """
+    Spatial index over a growing set of 3D points, for batched nearest-neighbour,
+    radius and plane-band queries.
+
+    Points live in one (N, 3) array and are identified by their insertion order
+    (0 to N-1). Most of them are indexed by a KD-tree (scipy's cKDTree); points
+    added since the tree was last built sit in a small buffer that is searched
+    by brute force, and the tree is rebuilt once the buffer holds more than
+    rebuild_threshold points. Queries combine both, so results always cover
+    every point added so far. (When many queries hit a large buffer at once,
+    a KD-tree over just the buffer is built for them instead.)
+
+    Usage:
+        index = PointIndex(points)                     # (N, 3) array or Point/Vector objects
+        distances, ids = index.nearest(queries, k=5)   # (M, 5) each
+        ids_per_query = index.within_radius(queries, 2.0)
+        index.add(new_points)
+    """
+
+    def __init__(self, points=(), rebuild_threshold=DEFAULT_REBUILD_THRESHOLD, leafsize=16):
+        if rebuild_threshold < 0:
+            raise ValueError("rebuild_threshold must not be negative.")
+        self.rebuild_threshold = rebuild_threshold
+        self.leafsize = leafsize
+        self._data = np.empty((0, 3))
+        self._size = 0
+        self._tree = None
+        self._tree_size = 0
+        self._buffer_tree = None
+        self.add(points)
+        self.rebuild()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def points(self):
+        """The (N, 3) array of every point, in insertion order (a read-only view)."""
+        view = self._data[:self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def buffered(self):
+        """Number of points added since the KD-tree was last built."""
+        return self._size - self._tree_size
+
+    def add(self, points):
+        """
+        Adds points (an (M, 3) array, nested list, or Point/Vector objects) and
+        returns their ids. Rebuilds the KD-tree if the buffer has grown past
+        rebuild_threshold.
+        """
+        new_points = _query_array(points)
+        start, end = self._size, self._size + len(new_points)
+        if end > len(self._data):
+            # Grow geometrically so repeated small additions stay amortized O(1)
+            grown = np.empty((max(end, 2 * len(self._data), 1024), 3))
+            grown[:start] = self._data[:start]
+            self._data = grown
+        self._data[start:end] = new_points
+        self._size = end
+        self._buffer_tree = None
+        if self.buffered > self.rebuild_threshold:
+            self.rebuild()
+        return np.arange(start, end)
+
+    def rebuild(self):
+        """Rebuilds the KD-tree over every point, emptying the buffer."""
+        self._tree = self._build_tree(0, self._size)
+        self._tree_size = self._size
+        self._buffer_tree = None
+
+    def _build_tree(self, start, end):
+        # The tree keeps a view of rows that are never written again, so no copy is needed
+        if start == end:
+            return None
+        return cKDTree(self._data[start:end], leafsize=self.leafsize, copy_data=False, balanced_tree=False)
+
+    def _searchers(self, num_queries):
+        """
+        Returns (tree, first_id) pairs covering every point: the main KD-tree,
+        plus the buffer as either None (searched by brute force, when that is
+        cheap for this many queries) or a KD-tree built on demand and kept
+        until the next add().
+        """
+        searchers = [(self._tree, 0)] if self._tree_size else []
+        if self.buffered:
+            if num_queries * self.buffered <= _BRUTE_FORCE_LIMIT:
+                searchers.append((None, self._tree_size))
+            else:
+                if self._buffer_tree is None:
+                    self._buffer_tree = self._build_tree(self._tree_size, self._size)
+                searchers.append((self._buffer_tree, self._tree_size))
+        return searchers
+
+    def _buffer_distances(self, queries):
+        """(M, B) distances from each query to each buffered point."""
+        difference = queries[:, np.newaxis, :] - self._data[np.newaxis, self._tree_size:self._size]
+        return np.sqrt(np.einsum("ijk,ijk->ij", difference, difference))
+
+    def nearest(self, queries, k=1):
+        """
+        Finds the k points nearest to each query point.
+
+        Args:
+            queries: (M, 3) array, nested list, or Point/Vector objects (or one of them).
+            k: Number of neighbours, from 1 to len(self).
+
+        Returns:
+            (distances, ids): two (M, k) arrays, nearest first.
+        """
+        queries = _query_array(queries)
+        if not 1 <= k <= self._size:
+            raise ValueError(f"k must be between 1 and the number of points ({self._size}), got {k}.")
+
+        candidate_distances, candidate_ids = [], []
+        for tree, first_id in self._searchers(len(queries)):
+            if tree is None:
+                distances = self._buffer_distances(queries)
+                ids = np.broadcast_to(np.arange(first_id, self._size), distances.shape)
+            else:
+                tree_k = min(k, tree.n)
+                distances, ids = tree.query(queries, k=tree_k)
+                distances = distances.reshape(len(queries), tree_k)
+                ids = ids.reshape(len(queries), tree_k) + first_id
+            candidate_distances.append(distances)
+            candidate_ids.append(ids)
+        if len(candidate_distances) == 1 and candidate_distances[0].shape[1] == k:
+            return candidate_distances[0], candidate_ids[0]  # Already the k nearest, sorted, from one tree
+
+        # Merge the candidates from the tree and the buffer, keeping the k nearest
+        distances, ids = np.hstack(candidate_distances), np.hstack(candidate_ids)
+        if k < distances.shape[1]:
+            top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            distances, ids = np.take_along_axis(distances, top, axis=1), np.take_along_axis(ids, top, axis=1)
+        order = np.argsort(distances, axis=1, kind="stable")
+        return np.take_along_axis(distances, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+    def within_radius(self, queries, radius):
+        """
+        Finds every point within radius of each query point.
+
+        Returns:
+            A list with one sorted int array of point ids per query.
+        """
+        queries = _query_array(queries)
+        matches = [[] for _ in range(len(queries))]
+        for tree, first_id in self._searchers(len(queries)):
+            if tree is None:
+                for row, row_distances in enumerate(self._buffer_distances(queries)):
+                    matches[row].append(np.flatnonzero(row_distances <= radius) + first_id)
+            else:
+                for row, ids in enumerate(tree.query_ball_point(queries, radius, return_sorted=True)):
+                    matches[row].append(np.asarray(ids, dtype=np.intp) + first_id)
+        # The main tree's ids all precede the buffer's, so concatenating keeps them sorted
+        return [np.concatenate(parts) if parts else np.empty(0, dtype=np.intp) for parts in matches]
+
+    def near_planes(self, planes, half_width):
+        """
+        Finds the points lying in a band of the given half-width around each
+        plane, i.e. within half_width of it. Degenerate planes match nothing.
+
+        Args:
+            planes: A PlaneSet, or Plane objects.
+            half_width: Maximum distance from the plane.
+
+        Returns:
+            A list with one sorted int array of point ids per plane.
+        """
+        planes = planes if isinstance(planes, PlaneSet) else PlaneSet.from_planes(planes)
+        points = self._data[:self._size]
+        matches = []
+        for normal, offset, degenerate in zip(planes.unit_normals, planes.offsets, planes.degenerate):
+            if degenerate:
+                matches.append(np.empty(0, dtype=np.intp))
+            else:
+                matches.append(np.flatnonzero(np.abs(points @ normal - offset) <= half_width))
+        return matches
+
+    def nearest_to_planes(self, planes, k=1):
+        """
+        Finds the k points closest to each plane.
+
+        Returns:
+            (distances, ids): two (K, k) arrays, closest first. Rows of
+            degenerate planes are NaN distances and -1 ids.
+        """
+        planes = planes if isinstance(planes, PlaneSet) else PlaneSet.from_planes(planes)
+        if not 1 <= k <= self._size:
+            raise ValueError(f"k must be between 1 and the number of points ({self._size}), got {k}.")
+        points = self._data[:self._size]
+        distances = np.full((len(planes), k), np.nan)
+        ids = np.full((len(planes), k), -1, dtype=np.intp)
+        for row, (normal, offset, degenerate) in enumerate(zip(planes.unit_normals, planes.offsets,
+                                                                planes.degenerate)):
+            if degenerate:
+                continue
+            plane_distances = np.abs(points @ normal - offset)
+            top = np.argpartition(plane_distances, k - 1)[:k] if k < self._size else np.arange(self._size)
+            top = top[np.argsort(plane_distances[top], kind="stable")]
+            distances[row], ids[row] = plane_distances[top], top
+        return distances, ids
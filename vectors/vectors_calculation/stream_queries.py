@@ -0,0 +1,147 @@
+"""
+Evaluates vector queries from a file or stdin and writes one JSON result per line.
+
+Input is read lazily and processed in fixed-size chunks, so memory use does not
+grow with the size of the input. Each input line is either a raw query such as
+[[1,2,3],[4,5,6],'dot_product'], a JSON string holding one, or a JSON object
+with the query under a "query" key.
+
+    python stream_queries.py queries.txt > results.jsonl
+    cat queries.jsonl | python stream_queries.py --chunk-size 5000
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+
+from batch_query import process_vector_queries
+from calc import new_output_data, set_error
+from parallel_queries import iter_results_parallel
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def read_queries(lines, query_field="query"):
+    """
+    Yields (line_number, query_string, error) for each non-blank input line.
+    Lines starting with '{' or '"' are decoded as JSON; others are taken as they are.
+    error is None, or the JSONDecodeError of a line that is not valid JSON
+    (query_string is then the raw line), so one bad line doesn't end the stream.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            if line[0] == "{":
+                query = json.loads(line).get(query_field, "")
+            elif line[0] == '"':
+                query = json.loads(line)
+            else:
+                query = line
+        except json.JSONDecodeError as e:
+            yield line_number, line, e
+            continue
+        yield line_number, query, None
+
+
+def _error_record(line_number, line, error):
+    output_data = new_output_data()
+    set_error(output_data, error, line)
+    return {"line": line_number, **output_data}
+
+
+def _finite_or_none(value):
+    """Replaces non-finite floats (nested in lists) with None, since JSON has no Infinity or NaN."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, list):
+        return [_finite_or_none(item) for item in value]
+    return value
+
+
+def record_json(record):
+    """
+    Serializes a result record as one line of strict JSON. Non-finite numbers
+    (e.g. the magnitude of [1e400, 0, 0]) are written as null; display_message
+    still shows them.
+    """
+    try:
+        return json.dumps(record, ensure_ascii=False, allow_nan=False)
+    except ValueError:
+        return json.dumps({key: _finite_or_none(value) for key, value in record.items()}, ensure_ascii=False)
+
+
+def stream_results(lines, chunk_size=DEFAULT_CHUNK_SIZE, query_field="query", workers=1):
+    """
+    Yields one result record per query in lines, in input order: the
+    process_vector_query output_data dict plus the input line number.
+    Lines that are not valid JSON, and queries that fail to parse or evaluate,
+    get an error record and the stream goes on.
+    Only one chunk of queries and results is held in memory at a time
+    (one or two per worker when workers > 1).
+    """
+    queries = read_queries(lines, query_field)
+    if workers != 1:
+        numbered_queries, queries_only = itertools.tee(queries)
+        results = iter_results_parallel((query for _, query, error in queries_only if error is None),
+                                        workers, chunk_size)
+        for line_number, query, error in numbered_queries:
+            if error is not None:
+                yield _error_record(line_number, query, error)
+            else:
+                yield {"line": line_number, **next(results)}
+        return
+    while True:
+        chunk = list(itertools.islice(queries, chunk_size))
+        if not chunk:
+            return
+        results = iter(process_vector_queries([query for _, query, error in chunk if error is None]))
+        for line_number, query, error in chunk:
+            if error is not None:
+                yield _error_record(line_number, query, error)
+            else:
+                yield {"line": line_number, **next(results)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", nargs="?", default="-", help="query file, or - for stdin (default)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"queries evaluated per batch (default {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes; 0 means one per CPU (default 1)")
+    parser.add_argument("--query-field", default="query", help="key holding the query in JSON object lines")
+    parser.add_argument("--plot-dir", help="also save a plot of each result to this directory (off by default)")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.workers < 0:
+        parser.error("--workers must not be negative")
+
+    plot_vector_data = None
+    if args.plot_dir:
+        from graph_plot import plot_vector_data # matplotlib is only needed when plotting
+        os.makedirs(args.plot_dir, exist_ok=True)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    try:
+        for record in stream_results(source, args.chunk_size, args.query_field, args.workers or None):
+            sys.stdout.write(record_json(record) + "\n")
+            if plot_vector_data is not None:
+                plot_vector_data(record, os.path.join(args.plot_dir, f"line_{record['line']}.png"))
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); stop quietly
+        sys.stderr.close()
+        return 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
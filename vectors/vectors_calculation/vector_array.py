@@ -0,0 +1,159 @@
+import numpy as np
+
+from calc import Vector
+
+
+def as_coordinate_array(points):
+    """
+    Returns points as an (N, 3) float64 array. points may be a VectorArray, an
+    array or nested list of 2D/3D coordinates, or a sequence of Point/Vector objects.
+    """
+    if isinstance(points, VectorArray):
+        return points.data
+    if not isinstance(points, np.ndarray):
+        points = list(points)
+        if points and hasattr(points[0], "x"):
+            points = [(p.x, p.y, p.z) for p in points]
+    return VectorArray(points).data
+
+
+class VectorArray:
+    """
+    A batch of 3D vectors stored as an (N, 3) float64 array.
+
+    Mirrors the Vector methods, but every operation runs over all rows at once.
+    Operations that can fail on a zero vector return a boolean mask of the
+    invalid rows instead of raising, and the values in those rows are NaN.
+    """
+
+    def __init__(self, data):
+        """Constructor. data is anything np.asarray can turn into (N, 3) or (N, 2)."""
+        data = np.asarray(data, dtype=np.float64)
+        if data.size == 0:
+            data = data.reshape(0, 3)
+        if data.ndim == 1 and data.size in (2, 3):
+            data = data.reshape(1, -1)
+        if data.ndim != 2 or data.shape[1] not in (2, 3):
+            raise ValueError(f"Expected an array of shape (N, 3) or (N, 2), got {data.shape}")
+        if data.shape[1] == 2:  # Handle 2D vectors by adding z=0, as process_vector_query does
+            data = np.column_stack([data, np.zeros(len(data))])
+        self.data = np.ascontiguousarray(data)
+
+    @classmethod
+    def from_vectors(cls, vectors):
+        """Builds a VectorArray from an iterable of Vector (or Point) objects."""
+        return cls([(v.x, v.y, v.z) for v in vectors])
+
+    def to_vectors(self):
+        """Returns the rows as a list of Vector objects."""
+        return [Vector(x, y, z) for x, y, z in self.data.tolist()]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        return VectorArray(self.data[index])
+
+    def __str__(self):
+        return "\n".join(str(v) for v in self.to_vectors())
+
+    @property
+    def x(self):
+        return self.data[:, 0]
+
+    @property
+    def y(self):
+        return self.data[:, 1]
+
+    @property
+    def z(self):
+        return self.data[:, 2]
+
+    # Each formula below keeps the same order of floating point operations as the
+    # matching Vector method, so results agree with the scalar path row by row.
+
+    def modulus(self):
+        x, y, z = self.x, self.y, self.z
+        return np.sqrt(x * x + y * y + z * z)
+
+    def add(self, other):
+        return VectorArray(self.data + other.data)
+
+    def subtract(self, other):
+        return VectorArray(self.data - other.data)
+
+    def multiply(self, scalar):
+        """Scales every row by scalar, which may be a float or an array of N floats."""
+        s = np.asarray(scalar, dtype=np.float64)
+        if s.ndim == 1:
+            s = s[:, np.newaxis]
+        return VectorArray(self.data * s)
+
+    scale = multiply
+
+    def unit_vector(self):
+        """Returns (unit vectors, zero_mask)."""
+        modulus_self = self.modulus()
+        zero = modulus_self == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = self.data / modulus_self[:, np.newaxis]
+        result[zero] = np.nan
+        return VectorArray(result), zero
+
+    def dot_product(self, other):
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    dot = dot_product
+
+    def cross_product(self, other):
+        return VectorArray(np.column_stack([
+            self.y * other.z - self.z * other.y,
+            self.z * other.x - self.x * other.z,
+            self.x * other.y - self.y * other.x,
+        ]))
+
+    cross = cross_product
+
+    def cos_angle(self, other):
+        """Returns (clamped cosines of the angles, zero_mask). A row is masked if either vector is zero."""
+        dot = self.dot_product(other)
+        mod_self = self.modulus()
+        mod_other = other.modulus()
+        zero = (mod_self == 0) | (mod_other == 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cos_angle = dot / (mod_self * mod_other)
+        # Vector.angle clamps with max/min, which turns NaN (e.g. from inf components) into 1.0
+        cos_angle = np.where(np.isnan(cos_angle), 1.0, np.clip(cos_angle, -1.0, 1.0))
+        cos_angle[zero] = np.nan
+        return cos_angle, zero
+
+    def angle(self, other):
+        """
+        Returns (angles in radians, zero_mask). A row is masked if either vector is zero.
+        np.arccos may differ from math.acos in the last bit, so compare with a tolerance.
+        """
+        cos_angle, zero = self.cos_angle(other)
+        return np.arccos(cos_angle), zero
+
+    def length_of_proj(self, other):
+        """Returns (projection lengths, zero_mask). A row is masked if other is zero."""
+        mod_other = other.modulus()
+        zero = mod_other == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = self.dot_product(other) / mod_other
+        result[zero] = np.nan
+        return result, zero
+
+    def projection_vector(self, other):
+        """Returns (projection vectors, zero_mask). A row is masked if other is zero."""
+        mod_other = other.modulus()
+        zero = mod_other == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            unit_other = other.data / mod_other[:, np.newaxis]
+            len_proj = self.dot_product(other) / mod_other
+        result = unit_other * len_proj[:, np.newaxis]
+        result[zero] = np.nan
+        return VectorArray(result), zero
+
+    def distance(self, other):
+        return self.subtract(other).modulus()